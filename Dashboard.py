@@ -3,12 +3,20 @@
 # ==============================================================================
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from pathlib import Path
-import os
-import re
-from typing import Any
+import time
+
+from scoring import satisfaction_cols, SCORE_COLUMNS
+from data_store import LazyFrame
+from sources import SITE_COL, LIVE, Source, read_sources, load_sources
+from refresher import DatasetRefresher, Snapshot, SiteView, format_age
+from aggregates import ALL_DEPARTMENTS, ALL_PERIODS, build_cubes, lookup_sum, add_cells, cell_distribution, department_n, department_n_rows, counts_table, cube_departments, cube_periods, aggregate_rows
+from metrics import RESPONSES, AVG_SATISFACTION, HEALTH_MODE, INTENT_METRICS, cell_metrics, n_col
+from filter_engine import FilterIndex, split_months, take_rows
+from text_index import TextIndexes, page_rows
+from charts import score_gauge, percent_gauge, distribution_bar, trend_chart
+from trends import TREND_METRICS, TrendStore, site_trends, trend_series
+import perf
 
 # ==============================================================================
 # PAGE CONFIGURATION & HEADER
@@ -96,77 +104,60 @@ st.markdown("""
       border-radius: 50%;
       animation: pulse-green 2s infinite;
   }
+  .stale-badge { background-color: #fff8e1; color: #8d6e00; border-color: #ffe082; }
+  .stale-badge .status-dot { background-color: #f5b700; animation: none; }
 </style>
 """, unsafe_allow_html=True)
 
 # ==============================================================================
 # DATA LOADING AND PREPARATION
 # ==============================================================================
-
-@st.cache_data(ttl=300) # Cache 5 นาที
-def load_and_prepare_data(source: Any) -> pd.DataFrame:
-    if source is None:
-        return pd.DataFrame()
-
-    try:
-        if isinstance(source, str):
-            if source.lower().endswith('.xlsx'):
-                df = pd.read_excel(source)
-            else:
-                df = pd.read_csv(source)
-        else:
-            if source.name.lower().endswith('.xlsx'):
-                df = pd.read_excel(source)
-            else:
-                df = pd.read_csv(source)
-    except Exception as e:
-        return pd.DataFrame()
-
-    # ----------------- Mapping ชื่อคอลัมน์ (OPD) -----------------
-    column_mapping = {
-        'หน่วยงานที่ท่านเข้ารับบริการ/ ต้องการประเมิน (เพื่อสะท้อนกลับหน่วยงานโดยตรง)': 'หน่วยงาน',
-        '1. ท่านมาใช้บริการ': 'ประเภทการมา',
-        '2. ท่านคิดว่าสุขภาพโดยรวมของท่าน (ณ ตอนนี้) เป็นอย่างไร': 'สุขภาพโดยรวม',
-        '3. เหตุผลที่เลือกใช้บริการ': 'เหตุผลที่เลือก',
-        'ส่วนที่ 1 ข้อมูลทั่วไปของผู้ตอบแบบประเมิน\n1. เพศ': 'เพศ',
-        '2. อายุ': 'อายุ',
-        '3. ภูมิลำเนา': 'ภูมิลำเนา',
-        '4. อาชีพ': 'อาชีพ',
-        '5. สิทธิในการรักษา': 'สิทธิการรักษา',
-        '6. วันที่มารับบริการ': 'วันที่รับบริการ',
-        'ความพึงพอใจต่อบริการของโรงพยาบาลในภาพรวม': 'ความพึงพอใจโดยรวม',
-        'แบบประเมิน [1.ขั้นตอนการติดต่อและเข้ารับการรักษาในโรงพยาบาล มีความสะดวกเพียงใด]': 'Q1_ความสะดวกขั้นตอน',
-        'แบบประเมิน [2.ขั้นตอนการนัดหมายเพื่อเข้ารับบริการ มีความสะดวกเพียงใด]': 'Q2_ความสะดวกนัดหมาย',
-        'แบบประเมิน [3.ท่านรู้สึกว่าระยะเวลารอคอยเพื่อพบแพทย์เหมาะสมเพียงใด]': 'Q3_ระยะเวลารอคอย',
-        'แบบประเมิน [4.ในการรับบริการครั้งนี้ ทีมผู้รักษา(แพทย์ พยาบาลและเจ้าหน้าที่) รับฟังและเปิดโอกาสให้ท่านซักถามข้อสงสัยได้มากน้อยเพียงใด]': 'Q4_การรับฟัง',
-        'แบบประเมิน [5. ในการรับบริการครั้งนี้ พยาบาลและเจ้าหน้าที่ให้ข้อมูลเกี่ยวกับขั้นตอนการรับบริการได้ชัดเจนเพียงใด]': 'Q5_ความชัดเจนข้อมูล',
-        'แบบประเมิน [6. ในการรับบริการครั้งนี้ ท่านรู้สึกว่าบุคลากรทุกคนดูแลท่านอย่างเท่าเทียมและให้เกียรติหรือไม่]': 'Q6_ความเท่าเทียม',
-        'แบบประเมิน [7. โรงพยาบาลมีความสะอาด และมีสิ่งอำนวยความ4เพียงพอต่อความต้องการของท่าน]': 'Q7_ความสะอาดและสิ่งอำนวยความสะดวก',
-        'แบบประเมิน [8. ก่อนรับบริการหรือการทำหัตถการ ท่านได้รับข้อมูลเกี่ยวกับค่าใช้จ่ายที่อาจเกิดขึ้น ชัดเจนเพียงใด]': 'Q8_ข้อมูลค่าใช้จ่าย',
-        'แบบประเมิน [9. ท่านได้รับข้อมูลการรักษา อาการแทรกซ้อนระหว่างการรักษาพยาบาล]': 'Q9_ข้อมูลการรักษา',
-        'แบบประเมิน [10. ท่านได้รับคำแนะนำอย่างชัดเจน ถึงอาการผิดปกติ ที่ต้องกลับมาพบแพทย์ และการมาตรวจตามนัด]': 'Q10_คำแนะนำกลับบ้าน',
-        '1. หากท่านมีอาการเจ็บป่วย ท่านจะพิจารณากลับมารับบริการที่โรงพยาบาลแห่งนี้หรือไม่': 'กลับมารับบริการหรือไม่',
-        '2. หากมีโอกาสท่านจะแนะนำผู้อื่นให้มารับบริการที่โรงพยาบาลแห่งนี้หรือไม่': 'แนะนำผู้อื่นหรือไม่',
-        '3. ท่านมีความไม่พึงพอใจในการมาใช้บริการที่โรงพยาบาลนี้หรือไม่': 'มีความไม่พึงพอใจหรือไม่',
-        '(หากมี) ความไม่พึงพอใจกรุณาระบุรายละเอียด เพื่อเป็นประโยชน์ในการปรับปรุง': 'รายละเอียดความไม่พึงพอใจ',
-        'ความคาดหวังต่อบริการของโรงพยาบาลในภาพรวม': 'ความคาดหวังต่อบริการ'
-    }
-    df = df.rename(columns=lambda c: column_mapping.get(str(c).strip(), str(c).strip()))
-
-    # ----------------- Time fields -----------------
-    if 'ประทับเวลา' in df.columns:
-        df['date_col'] = pd.to_datetime(df['ประทับเวลา'], dayfirst=True, errors='coerce')
-        df = df.dropna(subset=['date_col'])
-        df['เดือน'] = df['date_col'].dt.month
-        df['ไตรมาส'] = df['date_col'].dt.quarter
-        df['ปี'] = df['date_col'].dt.year
-    else:
-        df['date_col'] = pd.NaT
-        df['เดือน'] = None
-        df['ไตรมาส'] = None
-        df['ปี'] = None
-     
-    return df
+# โหมด instrumentation: ?profile=1 เปิดเฉพาะ session นี้, env MPX_OPD_PROFILE=1 เปิดทั้ง process
+profiling = perf.enabled() or st.query_params.get("profile") == "1"
+timer = perf.RenderTimer(profiling) # เวลาที่ใช้ของแต่ละส่วนใน rerun นี้ (ดู perf.py)
+
+def build_snapshot(df: pd.DataFrame, text: LazyFrame, source: str, loaded_at: float, status: tuple = (), previous: Snapshot = None) -> Snapshot:
+    # ข้อมูล + aggregate cube + filter index + text index และ cube/แนวโน้มของแต่ละสถานพยาบาล
+    # (แถวของแต่ละแห่งเลือกด้วย index.rows(site=...) บนชุดข้อมูลรวม ไม่มีสำเนาข้อมูลแยกต่อแห่ง)
+    # previous: snapshot รอบก่อน ผลรวมแนวโน้มของแต่ละแหล่งต่อยอดเฉพาะแถวที่เพิ่มเข้ามา (trends.site_trends)
+    with perf.stage('cube', rows=len(df)):
+        cube, site_cubes = build_cubes(df, SITE_COL)
+    with perf.stage('filter_index', rows=len(df)):
+        index = FilterIndex(df, SITE_COL)
+    with perf.stage('trends', rows=len(df), incremental=previous is not None):
+        stores = site_trends(df, index, status, {k: v.trends for k, v in previous.sites.items()} if previous is not None else None)
+        trends = TrendStore.combine(list(stores.values())) if stores else TrendStore.build(df)
+    sites = {site: SiteView(site_cubes[site], store) for site, store in stores.items() if site in site_cubes}
+    return Snapshot(df, text, cube, index, TextIndexes(text), trends, source, loaded_at, sites, tuple(status))
+
+def describe_sources(status) -> str:
+    # สถานะนับเฉพาะแหล่งที่มีชีต (url); แหล่งที่เป็นไฟล์อย่างเดียวแสดงแยกใต้ป้าย (ดู file_sources)
+    loaded = [s for s in status if s.origin]
+    if len(status) == 1:
+        return loaded[0].origin
+    sheets = [s for s in status if s.remote]
+    live = sum(s.live for s in sheets)
+    if not live:
+        return f"ไฟล์ {len(loaded)} แหล่ง"
+    return LIVE if live == len(sheets) else f"{LIVE} {live}/{len(sheets)} แหล่ง"
+
+def source_time(status) -> float:
+    # เวลาของข้อมูลสำหรับอายุ/ป้าย stale: ครั้งล่าสุดที่ดึงชีตสำเร็จ (mtime ของไฟล์ไม่เกี่ยว)
+    # ยังไม่มีแหล่งไหนดึงชีตได้ -> ไฟล์ที่เก่าที่สุด
+    live = [s.loaded_at for s in status if s.live]
+    return min(live) if live else min(s.loaded_at for s in status if s.origin)
+
+def file_sources(status) -> list:
+    # แหล่งที่เป็นไฟล์อย่างเดียว (ไม่มีชีต) ที่โหลดได้
+    return [s for s in status if s.origin and not s.remote]
+
+@st.cache_resource(ttl=300) # Cache 5 นาที (ข้อมูล + aggregate cube + filter index) ใช้ร่วมกันทุก session แบบอ่านอย่างเดียว
+def load_dataset(sources: tuple) -> Snapshot:
+    # ไฟล์ของทุกแหล่ง (ไม่ดึงชีต) ใช้ตอนยังไม่มีข้อมูลจาก Google Sheets
+    perf.count('load_dataset', 'miss') # ทำงานเฉพาะตอน cache miss; hit = call - miss
+    with perf.stage('load_sources', sources=len(sources)):
+        df, text, status = load_sources(sources, offline=True)
+    return build_snapshot(df, text, describe_sources(status), source_time(status), status)
 
 # ==============================================================================
 # MAIN APP LOGIC (Real-time Only)
@@ -177,46 +168,72 @@ DATA_FILE = "mpxo.xlsx" # ไฟล์สำรอง
 SHEET_ID = '1TYo_SQTHgs97kfmBl9An0wEXdbFT0ofIC4v8TGzWyk8'
 SHEET_GID = '1745557312'
 GSHEET_URL = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/export?format=csv&gid={SHEET_GID}"
+DEFAULT_SITE = "ศูนย์การแพทย์ มฟล."
+# หลายสถานพยาบาล: ระบุใน sources.json (หรือ env MPX_OPD_SOURCES) ดูรูปแบบใน sources.py
+SOURCES = read_sources(default=[Source(DEFAULT_SITE, GSHEET_URL, DATA_FILE)])
+FIRST_FETCH_WAIT = 10 # วินาทีที่ยอมรอ Google Sheets ครั้งแรกหลังเริ่ม process
+
+def fetch_live_snapshot(previous: Snapshot = None) -> Snapshot:
+    # ทุกแหล่งพร้อมกัน (sources.load_sources); แหล่งที่ดึงชีตไม่ได้ใช้ไฟล์สำรองของแหล่งนั้น
+    with perf.stage('load_sources', sources=len(SOURCES)):
+        df, text, status = load_sources(SOURCES)
+    if not any(s.live for s in status):
+        raise Exception("; ".join(f"{s.site}: {s.error}" for s in status if s.error) or "ไม่มีแหล่งข้อมูลออนไลน์")
+    if df.empty:
+        raise Exception("Empty data from Google Sheet")
+    return build_snapshot(df, text, describe_sources(status), source_time(status), status, previous)
 
-df_original = pd.DataFrame()
-data_source_info = ""
+@st.cache_resource # หนึ่ง refresher ต่อ process ใช้ร่วมกันทุก session
+def get_refresher() -> DatasetRefresher:
+    return DatasetRefresher(fetch_live_snapshot).start()
 
-# --- Loading Logic: Google Sheet First -> Local File Fallback ---
-try:
-    # พยายามดึง Real-time
-    df_original = load_and_prepare_data(GSHEET_URL)
-    if df_original.empty:
-        raise Exception("Empty data from Google Sheet")
-    data_source_info = "Google Sheets (Real-time 🟢)"
+# --- Loading Logic: Google Sheet (background) -> Local File Fallback ---
+refresher = get_refresher()
+if any(src.url for src in SOURCES):
+    refresher.wait_first_attempt(FIRST_FETCH_WAIT)
+snapshot = refresher.current()
 
-except Exception as e:
-    # ถ้าดึงไม่ได้ ให้ใช้ไฟล์สำรอง
-    if os.path.exists(DATA_FILE):
-        df_original = load_and_prepare_data(DATA_FILE)
-        data_source_info = f"ไฟล์สำรอง: {DATA_FILE} (Offline)"
-        st.sidebar.warning(f"⚠️ เชื่อมต่อ Google Sheet ไม่ได้ ({e}) ระบบจึงแสดงผลข้อมูลจากไฟล์สำรองแทน")
-    else:
-        st.error(f"⚠️ ไม่สามารถดึงข้อมูลจาก Google Sheets และไม่พบไฟล์สำรอง: {e}")
+if snapshot is None:
+    # ยังไม่เคยดึง Google Sheets สำเร็จ ให้ใช้ไฟล์สำรอง
+    e = refresher.last_error or "ยังดึงข้อมูลไม่เสร็จ"
+    try:
+        perf.count('load_dataset', 'call')
+        snapshot = load_dataset(SOURCES)
+    except Exception as file_error:
+        st.error(f"⚠️ ไม่สามารถดึงข้อมูลจาก Google Sheets และไม่พบไฟล์สำรอง: {e} ({file_error})")
         st.stop()
+    if any(src.url for src in SOURCES):
+        st.sidebar.warning(f"⚠️ เชื่อมต่อ Google Sheet ไม่ได้ ({e}) ระบบจึงแสดงผลข้อมูลจากไฟล์สำรองแทน")
+
+df_original, df_text, cube, row_index, comments, trends = snapshot.df, snapshot.text, snapshot.cube, snapshot.index, snapshot.comments, snapshot.trends
+data_source_info = f"{snapshot.source} · อัปเดต{format_age(snapshot.age)}"
 
 if df_original.empty:
     st.warning("ไม่พบข้อมูลในระบบ")
     st.stop()
+timer.lap("โหลดข้อมูล")
 
 # --- Sidebar: Status & Date ---
 st.sidebar.markdown("---")
 
 min_date_str = "N/A"
 max_date_str = "N/A"
-if 'date_col' in df_original.columns and not df_original['date_col'].isna().all():
-    min_date_str = df_original['date_col'].min().strftime('%d %b %Y')
-    max_date_str = df_original['date_col'].max().strftime('%d %b %Y')
+if pd.notna(row_index.min_date):
+    min_date_str = row_index.min_date.strftime('%d %b %Y')
+    max_date_str = row_index.max_date.strftime('%d %b %Y')
 
 # สร้าง HTML ปุ่มเรืองแสง (เขียนบรรทัดเดียวเพื่อป้องกัน Indentation Error)
-if "Real-time" in data_source_info:
+if snapshot.source == LIVE and snapshot.age < 2 * refresher.interval:
     source_html = f'<div class="realtime-badge"><div class="status-dot"></div>{data_source_info}</div>'
+elif snapshot.source == LIVE:
+    source_html = f'<div class="realtime-badge stale-badge"><div class="status-dot"></div>{data_source_info}</div>'
 else:
     source_html = f'<div style="margin-top:8px;font-size:0.8rem;color:#666;">📂 {data_source_info}</div>'
+files = file_sources(snapshot.status)
+if files and any(s.live for s in snapshot.status):
+    # ไฟล์อย่างเดียวไม่ทำให้ป้ายชีตกลายเป็นไม่ live; แสดงแยกพร้อมอายุของไฟล์เอง
+    files_age = format_age(max(0.0, time.time() - min(s.loaded_at for s in files)))
+    source_html += f'<div style="margin-top:8px;font-size:0.8rem;color:#666;">📂 ไฟล์ {len(files)} แหล่ง · อัปเดต{files_age}</div>'
 
 st.sidebar.markdown(f"""
 <div class="sidebar-info">
@@ -226,58 +243,77 @@ st.sidebar.markdown(f"""
 </div>
 """, unsafe_allow_html=True)
 
+if len(snapshot.status) > 1:
+    with st.sidebar.expander("แหล่งข้อมูล"):
+        for s in snapshot.status:
+            state = f"{s.origin} · {s.rows:,} แถว" if s.origin else "โหลดไม่ได้"
+            st.caption(f"**{s.site}**: {state}" + (f" ({s.error})" if s.error else ""))
+
 
 # --- Sidebar: Filters ---
 st.sidebar.header("ตัวกรองข้อมูล (Filter)")
-available_departments = ['ภาพรวมทั้งหมด']
-if 'หน่วยงาน' in df_original.columns:
-    available_departments += sorted(df_original['หน่วยงาน'].dropna().unique().tolist())
-
-selected_department = st.sidebar.selectbox("เลือกหน่วยงาน:", available_departments)
-time_filter_option = st.sidebar.selectbox("เลือกช่วงเวลา:", ["ทั้งหมด", "เลือกตามปี", "เลือกตามไตรมาส", "เลือกตามเดือน"])
-
-# Apply Filters
-df_filtered = df_original.copy()
-if time_filter_option != "ทั้งหมด" and 'ปี' in df_original.columns:
-    year_list = sorted(df_original['ปี'].dropna().unique(), reverse=True)
+ALL_SITES = "ทุกสถานพยาบาล"
+selected_site = ALL_SITES
+site_key = None # ส่งให้ row_index.select/rows; None = ทุกสถานพยาบาล
+if len(snapshot.sites) > 1:
+    selected_site = st.sidebar.selectbox("เลือกสถานพยาบาล:", [ALL_SITES, *snapshot.sites])
+    if selected_site != ALL_SITES:
+        site_key = selected_site
+        cube, trends = snapshot.sites[selected_site].cube, snapshot.sites[selected_site].trends
+selected_departments = st.sidebar.multiselect("เลือกหน่วยงาน:", cube_departments(cube), placeholder=ALL_DEPARTMENTS)
+# ไม่เลือก = ทุกหน่วยงาน; เลือกหน่วยงานเดียวใช้คีย์เดียวกับ cube ได้ หลายหน่วยงานส่งเป็น list ให้ FilterIndex
+if len(selected_departments) == 1:
+    selected_department = selected_departments[0]
+else:
+    selected_department = selected_departments or ALL_DEPARTMENTS
+department_label = ", ".join(selected_departments) or ALL_DEPARTMENTS
+time_filter_option = st.sidebar.selectbox("เลือกช่วงเวลา:", ["ทั้งหมด", "เลือกตามปี", "เลือกตามไตรมาส", "เลือกตามเดือน", "เลือกช่วงวันที่"])
+
+# Apply Filters: ตัวเลขสรุปอ่านจาก cube, ตารางข้อความใช้ row id ของชุดข้อมูลที่ใช้ร่วมกัน (ไม่ copy)
+selected_year = selected_quarter = selected_month_num = ALL_PERIODS
+selected_range = None
+if time_filter_option == "เลือกช่วงวันที่" and pd.notna(row_index.min_date):
+    date_range = st.sidebar.date_input("เลือกช่วงวันที่:", value=(row_index.min_date.date(), row_index.max_date.date()), min_value=row_index.min_date.date(), max_value=row_index.max_date.date())
+    if len(date_range) == 2:
+        selected_range = (pd.Timestamp(date_range[0]), pd.Timestamp(date_range[1]) + pd.Timedelta(days=1))
+elif time_filter_option != "ทั้งหมด" and 'ปี' in df_original.columns:
+    year_list = cube_periods(cube, 'ปี')
     if year_list:
         selected_year = st.sidebar.selectbox("เลือกปี:", year_list)
-        df_filtered = df_filtered[df_filtered['ปี'] == selected_year]
 
         if time_filter_option == "เลือกตามไตรมาส":
-            quarter_list = sorted(df_filtered['ไตรมาส'].dropna().unique())
+            quarter_list = cube_periods(cube, 'ไตรมาส', selected_year)
             selected_quarter = st.sidebar.selectbox("เลือกไตรมาส:", quarter_list)
-            df_filtered = df_filtered[df_filtered['ไตรมาส'] == selected_quarter]
         elif time_filter_option == "เลือกตามเดือน":
             month_map = {1: 'ม.ค.', 2: 'ก.พ.', 3: 'มี.ค.', 4: 'เม.ย.', 5: 'พ.ค.', 6: 'มิ.ย.', 7: 'ก.ค.', 8: 'ส.ค.', 9: 'ก.ย.', 10: 'ต.ค.', 11: 'พ.ย.', 12: 'ธ.ค.'}
-            month_list = sorted(df_filtered['เดือน'].dropna().unique())
+            month_list = cube_periods(cube, 'เดือน', selected_year)
             selected_month_num = st.sidebar.selectbox("เลือกเดือน:", month_list, format_func=lambda x: month_map.get(x, x))
-            df_filtered = df_filtered[df_filtered['เดือน'] == selected_month_num]
 
-if selected_department != 'ภาพรวมทั้งหมด' and 'หน่วยงาน' in df_filtered.columns:
-    df_filtered = df_filtered[df_filtered['หน่วยงาน'] == selected_department]
-
-if df_filtered.empty:
+department_keys = [selected_department] if isinstance(selected_department, str) else selected_department
+row_departments = None if selected_department == ALL_DEPARTMENTS else selected_department
+if selected_range is None:
+    filtered_rows = row_index.select(selected_department, selected_year, selected_quarter, selected_month_num, site=site_key)
+    selected_periods, edge_rows = [(selected_year, selected_quarter, selected_month_num)], []
+else:
+    filtered_rows = row_index.rows(row_departments, *selected_range, site=site_key)
+    # ช่วงวันที่กำหนดเอง: เดือนเต็มอ่านจาก cube สแกนแถวเฉพาะเศษเดือนต้น/ท้ายช่วง
+    selected_periods, edges = split_months(*selected_range)
+    edge_rows = [row_index.rows(row_departments, start, end, site=site_key) for start, end in edges]
+# หลายหน่วยงาน = ผลรวมช่องของ cube ของหน่วยงานที่เลือก (งานตามจำนวนช่อง ไม่ขึ้นกับจำนวนแถว)
+cell = lookup_sum(cube, department_keys, selected_periods)
+for rows in edge_rows:
+    cell = add_cells(cell, aggregate_rows(df_original, rows))
+if int(cell.get('n', 0)) == 0:
     st.warning("ไม่พบข้อมูลตามตัวกรองที่ท่านเลือก")
     st.stop()
+timer.lap("ตัวกรอง")
 
 # ==============================================================================
 # DASHBOARD CONTENT
 # ==============================================================================
-st.title(f"DASHBOARD: {selected_department}")
+st.title(f"DASHBOARD: {department_label}" + (f" · {selected_site}" if selected_site != ALL_SITES else ""))
 
 # --- Helpers ---
-LIKERT_MAP = {'มากที่สุด': 5, 'มาก': 4, 'ปานกลาง': 3, 'น้อย': 2, 'น้อยมาก': 1, ' มากที่สุด': 5, ' มาก': 4, ' ปานกลาง': 3, ' น้อย': 2, ' น้อยมาก': 1}
-def normalize_to_1_5(x):
-    if pd.isna(x): return pd.NA
-    s = str(x).strip()
-    if s in LIKERT_MAP: return LIKERT_MAP[s]
-    m = re.search(r'([1-5])', s)
-    if m: return int(m.group(1))
-    for k, v in LIKERT_MAP.items():
-        if k.strip() in s: return v
-    return pd.NA
-
 def render_average_heart_rating(avg_score, max_score=5, responses=None):
     if pd.isna(avg_score):
         st.info("ยังไม่มีคะแนนเฉลี่ยให้แสดง")
@@ -294,42 +330,56 @@ def render_average_heart_rating(avg_score, max_score=5, responses=None):
     labels_html = "".join([f'<span class="heart-label">{i}</span>' for i in range(1, max_score + 1)])
     st.markdown(f"""<style>.heart-wrap {{ width: 100%; border: 1px solid #eee; border-radius: 12px; padding: 16px; background: #fff; }} .heart {{ font-size: 40px; color: #E6E6E6; }} .heart.full {{ color: #e02424; }} .heart-labels {{ display: grid; grid-template-columns: repeat(5, 1fr); margin-top: 6px; color: #6b7280; text-align: center; }}</style><div class="heart-wrap"><div style="font-weight:600;margin-bottom:10px;">Average rating ({avg_score:.2f})</div><div>{hearts_html}</div><div class="heart-labels">{labels_html}</div>{"<div style='color:#6b7280;font-size:0.9rem;margin-top:6px;'>คำตอบ " + f"{responses:,}" + " ข้อ</div>" if responses else ""}</div>""", unsafe_allow_html=True)
 
-def plot_gauge_for_column_numseries(series_num, title, height=200, key=None):
-    s = series_num.dropna()
-    if s.empty:
+def plot_gauge_for_score(avg, n, title, height=200, key=None):
+    if n == 0:
         st.info(f"ไม่มีข้อมูลสำหรับ '{title}'")
         return
-    avg = float(s.mean()); n = int(s.size)
     st.markdown(f"<div class='gauge-head'>{title}</div><div class='gauge-sub'>n = {n}</div>", unsafe_allow_html=True)
-    fig = go.Figure(go.Indicator(mode="gauge+number", value=avg, number={'valueformat': '.2f'}, gauge={'axis': {'range': [1, 5]}, 'bar': {'color': '#111827'}, 'steps': [{'range': [1, 2], 'color': '#DC2626'}, {'range': [2, 3], 'color': '#EA580C'}, {'range': [3, 4], 'color': '#F59E0B'}, {'range': [4, 5], 'color': '#16A34A'}], 'threshold': {'line': {'color': '#111827', 'width': 2}, 'thickness': 0.6, 'value': avg}}))
-    fig.update_layout(margin=dict(t=10,b=10,l=10,r=10), height=height)
-    st.plotly_chart(fig, use_container_width=True, key=key)
+    with timer.measure("plotly_chart (รวม)"):
+        st.plotly_chart(score_gauge(avg, height), use_container_width=True, key=key)
 
 def render_percent_gauge(title, pct, n, height=200, key=None, mode='high_good'):
     st.markdown(f"<div class='gauge-head'>{title}</div><div class='gauge-sub'>n = {n}</div>", unsafe_allow_html=True)
-    colors = ['#DC2626', '#EA580C', '#F59E0B', '#16A34A'] if mode == 'high_good' else ['#16A34A', '#F59E0B', '#EA580C', '#DC2626']
-    ranges = [[0, 50], [50, 65], [65, 80], [80, 100]] if mode == 'high_good' else [[0, 5], [5, 10], [10, 20], [20, 100]]
-    steps = [{'range': r, 'color': c} for r, c in zip(ranges, colors)]
-    fig = go.Figure(go.Indicator(mode="gauge+number", value=float(pct), number={'suffix': '%', 'valueformat': '.1f'}, gauge={'axis': {'range': [0, 100]}, 'bar': {'color': '#111827'}, 'steps': steps, 'threshold': {'line': {'color': '#111827', 'width': 2}, 'thickness': 0.6, 'value': float(pct)}}))
-    fig.update_layout(margin=dict(t=10,b=10,l=10,r=10), height=height)
-    st.plotly_chart(fig, use_container_width=True, key=key)
-
-# --- Metrics Calc ---
-if 'ความพึงพอใจโดยรวม' in df_filtered.columns:
-    df_filtered['คะแนนความพึงพอใจ'] = df_filtered['ความพึงพอใจโดยรวม'].apply(normalize_to_1_5).astype('Float64')
-else:
-    df_filtered['คะแนนความพึงพอใจ'] = pd.Series(dtype='Float64')
+    with timer.measure("plotly_chart (รวม)"):
+        st.plotly_chart(percent_gauge(pct, height, mode), use_container_width=True, key=key)
 
-avg_score = df_filtered['คะแนนความพึงพอใจ'].mean()
+TEXT_PAGE_SIZE = 50
+
+def render_text_browser(title, col, key):
+    # ข้อความอิสระแบบแบ่งหน้า ใหม่สุดก่อน: ค้นจาก index ที่สร้างครั้งเดียวต่อการโหลด แล้วส่งไปเฉพาะหน้าปัจจุบัน
+    st.subheader(title)
+    text_index = comments.get(col)
+    if text_index is None:
+        return
+    q_col, p_col = st.columns([3, 1])
+    query = q_col.text_input("ค้นหาข้อความ", key=f"q_{key}", placeholder="พิมพ์คำที่ต้องการค้นหา")
+    page = p_col.number_input("หน้า", min_value=1, step=1, key=f"p_{key}")
+    page_ids, total, page = page_rows(text_index.search(query), filtered_rows, int(page) - 1, TEXT_PAGE_SIZE)
+    if total == 0:
+        st.info("ไม่พบข้อมูล")
+        return
+    cols = ['date_col', SITE_COL, 'หน่วยงาน', col] if len(snapshot.sites) > 1 and selected_site == ALL_SITES else ['date_col', 'หน่วยงาน', col]
+    rows = take_rows(df_original, page_ids, cols, df_text).rename(columns={'date_col': 'วันที่'})
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+    first = page * TEXT_PAGE_SIZE + 1
+    st.caption(f"แสดง {first:,}-{first + len(page_ids) - 1:,} จาก {total:,} รายการ (หน้า {page + 1}/{-(-total // TEXT_PAGE_SIZE)}, ใหม่สุดก่อน)")
+
+# --- Metrics Calc (metrics.py: ชุดเดียวกับรายงาน report.py) ---
+metrics = cell_metrics(cell)
+avg_score = metrics[AVG_SATISFACTION]
 display_avg = f"{avg_score:.2f}" if pd.notna(avg_score) else "N/A"
-total_resp = len(df_filtered)
-health_mode = df_filtered['สุขภาพโดยรวม'].mode()[0] if 'สุขภาพโดยรวม' in df_filtered.columns and not df_filtered['สุขภาพโดยรวม'].dropna().empty else "N/A"
+total_resp = int(metrics[RESPONSES])
+health_mode = metrics[HEALTH_MODE]
+
+def get_pct_val(col):
+    # (เปอร์เซ็นต์, จำนวนผู้ตอบข้อนั้น); ไม่มีผู้ตอบ -> 0
+    label = INTENT_METRICS[col]
+    n = int(metrics[n_col(label)])
+    return (metrics[label] if n > 0 else 0), n
 
-def calc_pct(df, col, val='ใช่'):
-    if col not in df.columns: return "N/A"
-    c = (df[col].astype(str).str.strip() == val).sum()
-    t = df[col].notna().sum()
-    return f"{(c/t)*100:.1f}%" if t > 0 else "N/A"
+def calc_pct(col):
+    pct, n = get_pct_val(col)
+    return f"{pct:.1f}%" if n > 0 else "N/A"
 
 # --- Metric Boxes ---
 st.markdown("##### ภาพรวม")
@@ -339,14 +389,18 @@ c2.markdown(f'<div class="metric-box metric-box-2"><div class="label">คะแ
 c3.markdown(f'<div class="metric-box metric-box-6"><div class="label">สุขภาพผู้ป่วยโดยรวม</div><div class="value" style="font-size:1.8rem">{health_mode}</div></div>', unsafe_allow_html=True)
 
 c4, c5, c6 = st.columns(3)
-c4.markdown(f'<div class="metric-box metric-box-3"><div class="label">% กลับมาใช้บริการ</div><div class="value">{calc_pct(df_filtered, "กลับมารับบริการหรือไม่")}</div></div>', unsafe_allow_html=True)
-c5.markdown(f'<div class="metric-box metric-box-4"><div class="label">% การบอกต่อ</div><div class="value">{calc_pct(df_filtered, "แนะนำผู้อื่นหรือไม่")}</div></div>', unsafe_allow_html=True)
-c6.markdown(f'<div class="metric-box metric-box-5"><div class="label">% ไม่พึงพอใจ</div><div class="value">{calc_pct(df_filtered, "มีความไม่พึงพอใจหรือไม่", "มี")}</div></div>', unsafe_allow_html=True)
+c4.markdown(f'<div class="metric-box metric-box-3"><div class="label">% กลับมาใช้บริการ</div><div class="value">{calc_pct("กลับมารับบริการหรือไม่")}</div></div>', unsafe_allow_html=True)
+c5.markdown(f'<div class="metric-box metric-box-4"><div class="label">% การบอกต่อ</div><div class="value">{calc_pct("แนะนำผู้อื่นหรือไม่")}</div></div>', unsafe_allow_html=True)
+c6.markdown(f'<div class="metric-box metric-box-5"><div class="label">% ไม่พึงพอใจ</div><div class="value">{calc_pct("มีความไม่พึงพอใจหรือไม่")}</div></div>', unsafe_allow_html=True)
 st.markdown("---")
 
-if selected_department == 'ภาพรวมทั้งหมด' and 'หน่วยงาน' in df_filtered.columns:
+if len(selected_departments) != 1 and 'หน่วยงาน' in df_original.columns:
     st.subheader("สรุปจำนวนการประเมินตามหน่วยงาน")
-    st.dataframe(df_filtered['หน่วยงาน'].value_counts().reset_index().rename(columns={'index':'หน่วยงาน', 'หน่วยงาน':'จำนวน'}), use_container_width=True, hide_index=True)
+    dept_n = department_n(cube, selected_periods, None if selected_department == ALL_DEPARTMENTS else department_keys)
+    for rows in edge_rows:
+        dept_n = dept_n.add(department_n_rows(df_original, rows), fill_value=0)
+    dept_counts = counts_table(dept_n)
+    st.dataframe(dept_counts, use_container_width=True, hide_index=True)
     st.markdown("---")
 
 # --- Satisfaction Detail ---
@@ -354,57 +408,70 @@ st.subheader("ความพึงพอใจภาพรวม")
 cl, cr = st.columns(2)
 with cl: render_average_heart_rating(avg_score, responses=total_resp)
 with cr:
-    rc = df_filtered['คะแนนความพึงพอใจ'].dropna().round().astype(int).value_counts().reindex([1,2,3,4,5], fill_value=0).reset_index()
-    rc.columns = ['คะแนน', 'จำนวน']
-    fig = px.bar(rc, x='คะแนน', y='จำนวน', title='Distribution (1-5)')
-    st.plotly_chart(fig, use_container_width=True)
+    with timer.measure("plotly_chart (รวม)"):
+        st.plotly_chart(distribution_bar(cell_distribution(cell)), use_container_width=True)
 st.markdown("---")
+timer.lap("ภาพรวม")
+
+# --- ส่วนรายละเอียด: render เฉพาะส่วนที่เลือก (ส่วนที่ไม่ได้เลือกไม่ถูกคำนวณ/สร้างกราฟเลย) ---
+SECTIONS = ["ส่วนที่ 2: รายหัวข้อ", "ส่วนที่ 3: ความตั้งใจ", "แนวโน้ม", "ข้อคิดเห็นผู้รับบริการ"]
+section = st.radio("รายละเอียด", SECTIONS, horizontal=True, label_visibility="collapsed", key="detail_section")
+
+if section == SECTIONS[0]:
+    st.header("ส่วนที่ 2: ความพึงพอใจต่อบริการ (รายหัวข้อ)")
+    cols = st.columns(2)
+    for i, (k, v) in enumerate(satisfaction_cols.items()):
+        if SCORE_COLUMNS[k] in df_original.columns:
+            with cols[i % 2]:
+                plot_gauge_for_score(metrics[k], int(metrics[n_col(k)]), v, key=f"g_{k}")
+
+elif section == SECTIONS[1]:
+    st.header("ส่วนที่ 3: ความตั้งใจในอนาคต")
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        p1, n1 = get_pct_val('กลับมารับบริการหรือไม่')
+        render_percent_gauge("1. กลับมารับบริการ (ใช่)", p1, n1, key="gp1")
+    with c2:
+        p2, n2 = get_pct_val('แนะนำผู้อื่นหรือไม่')
+        render_percent_gauge("2. แนะนำผู้อื่น (ใช่)", p2, n2, key="gp2")
+    with c3:
+        p3, n3 = get_pct_val('มีความไม่พึงพอใจหรือไม่')
+        render_percent_gauge("3. ไม่พึงพอใจ (มี)", p3, n3, key="gp3", mode='low_good')
+
+elif section == SECTIONS[2]:
+    # จากผลรวมรายสัปดาห์/รายเดือนที่สรุปไว้ตอนโหลด (trends.py) ไม่สแกนแถวข้อมูล
+    st.header("แนวโน้มตามช่วงเวลา")
+    c1, c2, c3 = st.columns([2, 2, 1])
+    trend_metric = c1.selectbox("ตัวชี้วัด", list(TREND_METRICS), key="trend_metric")
+    trend_freq = c2.radio("ความถี่", ["month", "week"], format_func={'month': 'รายเดือน', 'week': 'รายสัปดาห์'}.get, horizontal=True, key="trend_freq")
+    trend_window = c3.number_input("ค่าเฉลี่ยเคลื่อนที่ (ช่วง)", min_value=1, max_value=12, value=3, step=1, key="trend_window")
+    series = trend_series(trends, trend_metric, trend_freq, selected_department, int(trend_window))
+    if series['n'].sum() == 0:
+        st.info("ไม่มีข้อมูลสำหรับแสดงแนวโน้ม")
+    else:
+        unit = '%' if TREND_METRICS[trend_metric][0] == 'rate' else ''
+        with timer.measure("plotly_chart (รวม)"):
+            st.plotly_chart(trend_chart(series, unit), use_container_width=True)
+        st.caption("แสดงทุกช่วงเวลาของข้อมูล (ไม่ขึ้นกับตัวกรองช่วงเวลา) · แถบสีคือช่วงความเชื่อมั่น 95% · เส้นประคือค่าเฉลี่ยเคลื่อนที่ถ่วงด้วยจำนวนผู้ตอบ")
 
-st.header("ส่วนที่ 2: ความพึงพอใจต่อบริการ (รายหัวข้อ)")
-satisfaction_cols = {
-    'Q1_ความสะดวกขั้นตอน': '1. ความสะดวกขั้นตอนการติดต่อ',
-    'Q2_ความสะดวกนัดหมาย': '2. ความสะดวกขั้นตอนการนัดหมาย',
-    'Q3_ระยะเวลารอคอย': '3. ความเหมาะสมระยะเวลารอคอย',
-    'Q4_การรับฟัง': '4. การรับฟังและเปิดโอกาสให้ซักถาม',
-    'Q5_ความชัดเจนข้อมูล': '5. ความชัดเจนข้อมูลขั้นตอนบริการ',
-    'Q6_ความเท่าเทียม': '6. การดูแลอย่างเท่าเทียม',
-    'Q7_ความสะอาดและสิ่งอำนวยความสะดวก': '7. ความสะอาดและสิ่งอำนวยความสะดวก',
-    'Q8_ข้อมูลค่าใช้จ่าย': '8. ความชัดเจนข้อมูลค่าใช้จ่าย',
-    'Q9_ข้อมูลการรักษา': '9. ข้อมูลการรักษา/อาการแทรกซ้อน',
-    'Q10_คำแนะนำกลับบ้าน': '10. คำแนะนำเมื่อกลับบ้าน'
-}
-cols = st.columns(2)
-for i, (k, v) in enumerate(satisfaction_cols.items()):
-    if k in df_filtered.columns:
-        with cols[i % 2]:
-            plot_gauge_for_column_numseries(df_filtered[k].apply(normalize_to_1_5).astype('Float64'), v, key=f"g_{k}")
-
-st.markdown("---")
-st.header("ส่วนที่ 3: ความตั้งใจในอนาคต")
-c1, c2, c3 = st.columns(3)
-def get_pct_val(col, val='ใช่'):
-    s = df_filtered[col].dropna().astype(str).str.strip()
-    return (s == val).sum() / s.size * 100 if s.size > 0 else 0, s.size
-
-p1, n1 = get_pct_val('กลับมารับบริการหรือไม่', 'ใช่')
-render_percent_gauge("1. กลับมารับบริการ (ใช่)", p1, n1, key="gp1")
-with c2:
-    p2, n2 = get_pct_val('แนะนำผู้อื่นหรือไม่', 'ใช่')
-    render_percent_gauge("2. แนะนำผู้อื่น (ใช่)", p2, n2, key="gp2")
-with c3:
-    p3, n3 = get_pct_val('มีความไม่พึงพอใจหรือไม่', 'มี')
-    render_percent_gauge("3. ไม่พึงพอใจ (มี)", p3, n3, key="gp3", mode='low_good')
-
-st.markdown("---")
-st.subheader("รายละเอียดความไม่พึงพอใจ")
-if 'รายละเอียดความไม่พึงพอใจ' in df_filtered.columns:
-    det = df_filtered[df_filtered['รายละเอียดความไม่พึงพอใจ'].notna()]
-    det = det[~det['รายละเอียดความไม่พึงพอใจ'].astype(str).str.strip().isin(['', 'ไม่มี', '-'])]
-    if not det.empty: st.dataframe(det[['หน่วยงาน', 'รายละเอียดความไม่พึงพอใจ']], use_container_width=True, hide_index=True)
-    else: st.info("ไม่พบข้อมูล")
-
-st.subheader("ความคาดหวังต่อบริการ")
-if 'ความคาดหวังต่อบริการ' in df_filtered.columns:
-    sug = df_filtered[df_filtered['ความคาดหวังต่อบริการ'].notna()]
-    if not sug.empty: st.dataframe(sug[['หน่วยงาน', 'ความคาดหวังต่อบริการ']], use_container_width=True, hide_index=True)
-    else: st.info("ไม่พบข้อมูล")
+else:
+    render_text_browser("รายละเอียดความไม่พึงพอใจ", 'รายละเอียดความไม่พึงพอใจ', key="complaints")
+    render_text_browser("ความคาดหวังต่อบริการ", 'ความคาดหวังต่อบริการ', key="expectations")
+
+timer.lap(section)
+st.session_state['render_timings'] = timer.timings
+
+# --- Instrumentation panel (?profile=1 หรือ MPX_OPD_PROFILE=1) ---
+if profiling:
+    timer.log(department=department_label, section=section, rows=len(filtered_rows))
+    with st.sidebar.expander("⏱️ Instrumentation", expanded=False):
+        st.caption("เวลาแต่ละส่วนของ rerun นี้ (ms)")
+        st.dataframe(pd.DataFrame({'ส่วน': list(timer.timings), 'ms': [round(v, 2) for v in timer.timings.values()]}), use_container_width=True, hide_index=True)
+        counts = perf.counters()
+        st.caption("Cache / sync (ตั้งแต่เริ่ม process)")
+        calls, misses = counts.get(('load_dataset', 'call'), 0), counts.get(('load_dataset', 'miss'), 0)
+        counts[('load_dataset', 'hit')] = max(0, calls - misses)
+        st.dataframe(pd.DataFrame([{'ชื่อ': n, 'ผล': o, 'จำนวน': c} for (n, o), c in sorted(counts.items())]), use_container_width=True, hide_index=True)
+        st.caption("ขั้นตอนโหลดข้อมูลล่าสุด")
+        stages = perf.recent_stages(30)[::-1]
+        st.dataframe(pd.DataFrame([{'ขั้นตอน': e['stage'], 'ms': e['ms'], 'thread': e['thread'], 'เวลา': time.strftime('%H:%M:%S', time.localtime(e['ts']))} for e in stages]), use_container_width=True, hide_index=True)
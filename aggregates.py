@@ -0,0 +1,188 @@
+# ==============================================================================
+# AGGREGATE CUBE
+# ==============================================================================
+# สรุปผลล่วงหน้าครั้งเดียวต่อการโหลดข้อมูล โดยแบ่งตาม (หน่วยงาน, ปี, ไตรมาส, เดือน)
+# พร้อม rollup ทุกระดับที่ตัวกรองใน sidebar เลือกได้ ทำให้การดึงตัวเลขของ
+# metric box / gauge / สรุปรายหน่วยงาน เป็นการ lookup ครั้งเดียวไม่ว่าข้อมูลจะมีกี่แถว
+import numpy as np
+import pandas as pd
+
+from scoring import SCORE_COLUMNS, OVERALL_SCORE_COL, MISSING_SCORE
+
+CUBE_KEYS = ['หน่วยงาน', 'ปี', 'ไตรมาส', 'เดือน']
+ALL_DEPARTMENTS = 'ภาพรวมทั้งหมด'
+ALL_PERIODS = 0  # ปี/ไตรมาส/เดือน = 0 หมายถึงไม่กรองระดับนั้น
+
+HEALTH_COL = 'สุขภาพโดยรวม'
+# คำถามความตั้งใจ -> คำตอบที่นับเป็น "ใช่"
+INTENT_COLS = {
+    'กลับมารับบริการหรือไม่': 'ใช่',
+    'แนะนำผู้อื่นหรือไม่': 'ใช่',
+    'มีความไม่พึงพอใจหรือไม่': 'มี',
+}
+HEALTH_PREFIX = f'{HEALTH_COL}::'
+
+# ระดับเวลาที่ sidebar เลือกได้: ทั้งหมด / ปี / ไตรมาส / เดือน
+_TIME_LEVELS = [(), ('ปี',), ('ปี', 'ไตรมาส'), ('ปี', 'เดือน')]
+
+
+def _equals(s: pd.Series, val: str) -> np.ndarray:
+    # เทียบคำตอบ (ตัดช่องว่าง) กับ val; คอลัมน์ category เทียบแค่ตารางคำตอบแล้วแปลงผ่านรหัส
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        hit = np.append(s.cat.categories.astype(str).str.strip() == val, False)  # รหัส -1 (NaN) -> False
+        return hit[s.cat.codes.to_numpy()]
+    return (s.astype(str).str.strip() == val).to_numpy()
+
+
+def _row_measures(df: pd.DataFrame) -> pd.DataFrame:
+    # ค่าต่อแถวที่นำไปรวม (sum) ได้: จำนวน, ผลรวมคะแนน, ผลรวมกำลังสอง, จำนวน "ใช่"
+    m = {'n': np.ones(len(df), dtype=np.int64)}
+    for score_col in SCORE_COLUMNS.values():
+        if score_col not in df.columns:
+            continue
+        s = df[score_col].to_numpy(dtype=np.int64)
+        m[f'{score_col}__n'] = (s != MISSING_SCORE).astype(np.int64)
+        m[f'{score_col}__sum'] = s
+        m[f'{score_col}__sumsq'] = s * s
+    if OVERALL_SCORE_COL in df.columns:
+        s = df[OVERALL_SCORE_COL].to_numpy()
+        for k in range(1, 6):
+            m[f'{OVERALL_SCORE_COL}__eq{k}'] = (s == k).astype(np.int64)
+    for col, val in INTENT_COLS.items():
+        if col not in df.columns:
+            continue
+        m[f'{col}__yes'] = _equals(df[col], val).astype(np.int64)
+        m[f'{col}__n'] = df[col].notna().to_numpy(dtype=np.int64)
+    measures = pd.DataFrame(m, index=df.index)
+    if HEALTH_COL in df.columns:
+        health = df[HEALTH_COL].dropna()
+        health = health.cat.remove_unused_categories() if isinstance(health.dtype, pd.CategoricalDtype) else health.astype(str)
+        tallies = pd.get_dummies(health, prefix=HEALTH_COL, prefix_sep='::', dtype=np.int64)
+        measures = measures.join(tallies.reindex(df.index, fill_value=0))
+    return measures
+
+
+def _base(df: pd.DataFrame, keys: list) -> pd.DataFrame:
+    # ผลรวมต่อค่าของ keys: สแกนแถวข้อมูลครั้งเดียว ขั้นต่อไป (rollup) ทำบนตารางที่เล็กแล้วนี้
+    return pd.concat([df.reindex(columns=keys), _row_measures(df)], axis=1).groupby(keys, dropna=False, sort=False, observed=True).sum().reset_index()
+
+
+def build_cube(df: pd.DataFrame) -> pd.DataFrame:
+    if df.empty:
+        return pd.DataFrame()
+    return _rollup(_base(df, CUBE_KEYS))
+
+
+def build_cubes(df: pd.DataFrame, by: str) -> tuple[pd.DataFrame, dict]:
+    # (cube ของทั้งชุด, {ค่าใน by: cube ของแถวกลุ่มนั้น}) เช่น by = สถานพยาบาล
+    # สแกนแถวข้อมูลครั้งเดียว ไม่ต้องแยก DataFrame ของแต่ละกลุ่ม
+    if df.empty or by not in df.columns:
+        return build_cube(df), {}
+    base = _base(df, [by, *CUBE_KEYS])
+    total = base.drop(columns=by).groupby(CUBE_KEYS, dropna=False, sort=False, observed=True).sum().reset_index()
+    parts = {k: _rollup(part.drop(columns=by).reset_index(drop=True)) for k, part in base.groupby(by, sort=False, observed=True)}
+    return _rollup(total), parts
+
+
+def _rollup(base: pd.DataFrame) -> pd.DataFrame:
+    measure_cols = [c for c in base.columns if c not in CUBE_KEYS]
+
+    parts = []
+    for by_dept in (True, False):
+        for level in _TIME_LEVELS:
+            group_keys = (['หน่วยงาน'] if by_dept else []) + list(level)
+            if group_keys:
+                part = base.groupby(group_keys, dropna=False, sort=False, observed=True)[measure_cols].sum().reset_index()
+            else:
+                part = base[measure_cols].sum().to_frame().T
+            if not by_dept:
+                part['หน่วยงาน'] = ALL_DEPARTMENTS
+            for k in ('ปี', 'ไตรมาส', 'เดือน'):
+                if k not in level:
+                    part[k] = ALL_PERIODS
+            parts.append(part)
+    return pd.concat(parts, ignore_index=True).set_index(CUBE_KEYS).sort_index()
+
+
+def lookup(cube: pd.DataFrame, department=ALL_DEPARTMENTS, year=ALL_PERIODS, quarter=ALL_PERIODS, month=ALL_PERIODS) -> pd.Series:
+    # ดึงผลรวมของตัวกรองชุดหนึ่ง; ไม่มีข้อมูลในช่วงนั้น -> ทุกค่าเป็น 0
+    # department เป็น list ได้ (หลายหน่วยงาน) -> ผลรวมช่องของทุกหน่วยงานที่เลือก
+    if not isinstance(department, str):
+        return lookup_sum(cube, department, [(year, quarter, month)])
+    try:
+        return cube.loc[(department, year, quarter, month)]
+    except KeyError:
+        return pd.Series(0, index=cube.columns, dtype=np.int64)
+
+
+def lookup_sum(cube: pd.DataFrame, departments: list, periods: list) -> pd.Series:
+    # ผลรวมของทุกช่อง (หน่วยงาน, ช่วง) ใน departments x periods [(ปี, ไตรมาส, เดือน), ...]
+    # ช่องที่ไม่มีนับเป็น 0; งานตามจำนวนช่องที่เลือก ไม่ขึ้นกับจำนวนแถวข้อมูล
+    keys = pd.MultiIndex.from_tuples([(d, *p) for d in departments for p in periods], names=CUBE_KEYS)
+    return cube.reindex(keys).sum().astype(np.int64)
+
+
+def add_cells(cell: pd.Series, other: pd.Series) -> pd.Series:
+    # รวมผลสรุปสองชุด (เช่นช่องของ cube + aggregate_rows ของช่วงเศษเดือน) คอลัมน์ที่ขาดนับเป็น 0
+    return cell.add(other, fill_value=0).astype(np.int64)
+
+
+def cell_distribution(cell: pd.Series) -> pd.DataFrame:
+    counts = [int(cell.get(f'{OVERALL_SCORE_COL}__eq{k}', 0)) for k in range(1, 6)]
+    return pd.DataFrame({'คะแนน': range(1, 6), 'จำนวน': counts})
+
+
+def department_n(cube: pd.DataFrame, periods: list, departments=None) -> pd.Series:
+    # จำนวนผู้ตอบต่อหน่วยงาน รวมทุกช่วงใน periods [(ปี, ไตรมาส, เดือน), ...]; departments=None คือทุกหน่วยงาน
+    if cube.empty:
+        return pd.Series(dtype=np.int64)
+    hit = cube.index.droplevel('หน่วยงาน').isin(pd.MultiIndex.from_tuples(periods, names=CUBE_KEYS[1:]))
+    depts = cube.index.get_level_values('หน่วยงาน')
+    hit &= (depts != ALL_DEPARTMENTS) & depts.notna()
+    if departments is not None:
+        hit &= depts.isin(list(departments))
+    return cube.loc[hit, 'n'].groupby(level='หน่วยงาน', observed=True).sum()
+
+
+def department_n_rows(df: pd.DataFrame, rows) -> pd.Series:
+    if 'หน่วยงาน' not in df.columns:
+        return pd.Series(dtype=np.int64)
+    return df['หน่วยงาน'].iloc[rows].value_counts()
+
+
+def counts_table(n: pd.Series) -> pd.DataFrame:
+    # จำนวนต่อหน่วยงาน -> ตาราง (หน่วยงาน, จำนวน) เรียงจากมากไปน้อย ไม่รวมหน่วยงานที่ไม่มีผู้ตอบ
+    n = n[n > 0].astype(np.int64)
+    return n.sort_values(ascending=False, kind='stable').rename('จำนวน').rename_axis('หน่วยงาน').reset_index()
+
+
+def department_counts(cube: pd.DataFrame, year=ALL_PERIODS, quarter=ALL_PERIODS, month=ALL_PERIODS) -> pd.DataFrame:
+    return counts_table(department_n(cube, [(year, quarter, month)]))
+
+
+def cube_departments(cube: pd.DataFrame) -> list:
+    if cube.empty:
+        return []
+    depts = cube.index.get_level_values('หน่วยงาน').unique()
+    return sorted(d for d in depts if pd.notna(d) and d != ALL_DEPARTMENTS)
+
+
+def cube_periods(cube: pd.DataFrame, level: str, year=ALL_PERIODS) -> list:
+    # ค่าที่เลือกได้ของ 'ปี' / 'ไตรมาส' / 'เดือน' (ไตรมาส/เดือนภายในปีที่เลือก)
+    if cube.empty:
+        return []
+    idx = cube.xs(ALL_DEPARTMENTS, level='หน่วยงาน').index.to_frame(index=False)
+    if level != 'ปี':
+        idx = idx[idx['ปี'] == year]
+    values = idx[level].dropna()
+    return sorted(values[values != ALL_PERIODS].unique().tolist(), reverse=(level == 'ปี'))
+
+
+def aggregate_rows(df: pd.DataFrame, rows) -> pd.Series:
+    # สรุปผลแบบเดียวกับช่องของ cube สำหรับชุด row id ใด ๆ (เช่นช่วงวันที่ที่กำหนดเอง)
+    cols = [c for c in [*SCORE_COLUMNS.values(), *INTENT_COLS, HEALTH_COL] if c in df.columns]
+    return _row_measures(df.iloc[rows, df.columns.get_indexer(cols)]).sum()
+
+
+def department_counts_rows(df: pd.DataFrame, rows) -> pd.DataFrame:
+    return counts_table(department_n_rows(df, rows))
@@ -0,0 +1,134 @@
+# ==============================================================================
+# BENCHMARK: ขั้นตอนของ pipeline ข้อมูลตามจำนวนแถว
+# ==============================================================================
+# สร้างข้อมูลสังเคราะห์ (benchmarks/synth.py) หลายขนาด แล้วจับเวลาแต่ละขั้นแยกกัน:
+#   load      : อ่าน CSV ที่ export จากชีต (ทุกคอลัมน์เป็นข้อความ แบบ sheet_sync)
+#   rename    : data_loader.rename_columns
+#   dates     : data_loader.add_time_fields (parse 'ประทับเวลา' + เรียงตามเวลา)
+#   scoring   : scoring.add_score_columns
+#   compact   : data_loader.compact_frame (category / ตัด Likert ดิบ)
+#   store     : เขียน Feather + อ่านกลับแบบ read_split (เส้นทางของ snapshot/sync)
+#   index     : filter_engine.FilterIndex
+#   filter    : FilterIndex.select หน่วยงาน x เดือน (เวลาเฉลี่ยต่อครั้ง)
+#   cube      : aggregates.build_cube
+#   metrics   : metrics.metrics_table ทุกหน่วยงาน x ทุกเดือน
+#   trends    : trends.TrendStore.build (ผลรวมรายสัปดาห์/รายเดือนทั้งชุด; ไม่รวมแบบต่อยอด)
+# หน่วยความจำ: peak ของ tracemalloc ระหว่างขั้นนั้น (รันซ้ำอีกรอบโดยเปิด tracemalloc
+# เพื่อไม่ให้ overhead ไปปนกับเวลา) และ peak RSS ของทั้ง process
+# แต่ละขนาดรันใน subprocess แยก ไฟล์ CSV ที่สร้างแล้วเก็บไว้ใช้ซ้ำใน --data-dir
+#
+#   python benchmarks/bench_pipeline.py --rows 1000 10000 100000 1000000 --json bench.json
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+FILTER_QUERIES = 200
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Linux: KB
+
+
+def _stages(csv_path: Path, store_dir: Path):
+    # (ชื่อขั้น, ฟังก์ชันที่รับผลของขั้นก่อนหน้า) แต่ละฟังก์ชันไม่แก้ไข input จึงรันซ้ำได้
+    import numpy as np
+    import pandas as pd
+    from aggregates import build_cube
+    from data_loader import CORE_COLUMNS, rename_columns, add_time_fields, compact_frame
+    from data_store import write_frame, read_split
+    from filter_engine import FilterIndex
+    from metrics import metrics_table
+    from scoring import add_score_columns
+    from trends import TrendStore
+
+    def store(df):
+        path = store_dir / 'bench.feather'
+        write_frame(df, path)
+        core, text = read_split(path, CORE_COLUMNS)
+        return core
+
+    def filter_queries(index):
+        rng = np.random.default_rng(0)
+        depts = state['df']['หน่วยงาน'].dropna().unique().tolist()
+        for _ in range(FILTER_QUERIES):
+            index.select(depts[rng.integers(len(depts))], 2024, month=int(rng.integers(1, 13)))
+        return index
+
+    state = {}
+    return [
+        ('load', lambda _: pd.read_csv(csv_path, dtype=str)),
+        ('rename', rename_columns),
+        ('dates', add_time_fields),
+        ('scoring', add_score_columns),
+        ('compact', compact_frame),
+        ('store', store),
+        ('index', lambda df: (state.setdefault('df', df), FilterIndex(df))[1]),
+        ('filter', filter_queries),
+        ('cube', lambda _: build_cube(state['df'])),
+        ('metrics', lambda cube: metrics_table(cube, 'month')),
+        ('trends', lambda _: TrendStore.build(state['df'])),
+    ]
+
+
+def _worker(csv_path: str) -> None:
+    results = []
+    with tempfile.TemporaryDirectory() as store_dir:
+        value = None
+        for name, stage in _stages(Path(csv_path), Path(store_dir)):
+            t0 = time.perf_counter()
+            out = stage(value)
+            seconds = time.perf_counter() - t0
+            tracemalloc.start()
+            stage(value)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            if name == 'filter':
+                seconds /= FILTER_QUERIES
+            results.append({'stage': name, 'seconds': seconds, 'peak_mb': peak / 2**20})
+            value = out
+    print(json.dumps({'stages': results, 'peak_rss_mb': _peak_rss_mb()}))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time each stage of the data pipeline on synthetic data")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument('--data-dir', default=str(ROOT / '.cache' / 'bench'))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="บันทึกผลเป็น JSON (ไว้เทียบหา regression)")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _worker(args.worker)
+        return
+
+    from synth import write_csv
+    report = {}
+    for rows in args.rows:
+        csv_path = Path(args.data_dir) / f'synth_{rows}_{args.seed}.csv'
+        if not csv_path.exists():
+            write_csv(csv_path, rows, args.seed)
+        out = subprocess.run([sys.executable, __file__, '--worker', str(csv_path)],
+                             capture_output=True, text=True, check=True).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        report[rows] = result
+        print(f"\nrows={rows:,}  peak RSS {result['peak_rss_mb']:.0f} MB")
+        print(f"{'stage':<10}{'ms':>12}{'peak MB':>10}")
+        for r in result['stages']:
+            print(f"{r['stage']:<10}{r['seconds'] * 1000:>12.3f}{r['peak_mb']:>10.1f}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
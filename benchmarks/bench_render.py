@@ -0,0 +1,54 @@
+# ==============================================================================
+# BENCHMARK: เวลา render ของแต่ละส่วนในหนึ่ง rerun
+# ==============================================================================
+# รัน Dashboard.py ผ่าน streamlit AppTest (ไม่ต้องเปิด browser) แล้วสลับหน่วยงาน/ส่วน
+# รายละเอียดวนไปเรื่อย ๆ อ่านเวลาที่ Dashboard จับไว้ (perf.RenderTimer) จาก
+# st.session_state['render_timings'] แล้วสรุปค่า median ต่อส่วน (มิลลิวินาที)
+# รอบแรกของแต่ละค่าตัวกรองคือ cache miss ของ figure; รอบที่วนกลับมาคือ cache hit
+#
+#   python benchmarks/bench_render.py --rounds 3
+import argparse
+import os
+import statistics
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-section render time of the dashboard")
+    parser.add_argument('--rounds', type=int, default=3, help="จำนวนรอบที่วนทุกหน่วยงาน x ทุกส่วน")
+    parser.add_argument('--departments', type=int, default=5)
+    args = parser.parse_args()
+
+    from streamlit.testing.v1 import AppTest
+    os.environ['PYTHONPATH'] = str(ROOT)  # ให้ script ของ AppTest import module ข้าง ๆ ได้
+    os.chdir(ROOT)
+    at = AppTest.from_file(str(ROOT / 'Dashboard.py'), default_timeout=120)
+    at.run()
+    departments = [[]] + [[d] for d in at.sidebar.multiselect[0].options[:args.departments - 1]]  # [] = ทุกหน่วยงาน
+    sections = at.radio[0].options
+
+    samples = defaultdict(lambda: defaultdict(list))  # round -> section -> [ms]
+    for r in range(args.rounds):
+        for dept in departments:
+            at.sidebar.multiselect[0].set_value(dept)
+            for section in sections:
+                at.radio[0].set_value(section).run()
+                if at.exception:
+                    raise SystemExit(at.exception[0].value)
+                for name, ms in at.session_state['render_timings'].items():
+                    samples[r][name].append(ms)
+
+    names = list(samples[0])
+    print(f"departments={len(departments)} sections={len(sections)} rounds={args.rounds}  (median ms)")
+    print(f"{'section':<28}" + "".join(f"{'round ' + str(r + 1):>10}" for r in range(args.rounds)))
+    for name in names:
+        print(f"{name:<28}" + "".join(f"{statistics.median(samples[r][name]):>10.2f}" for r in range(args.rounds)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+# ==============================================================================
+# BENCHMARK: หน่วยความจำเมื่อมีหลาย session พร้อมกัน
+# ==============================================================================
+# จำลอง N session ที่เปิด dashboard พร้อมกัน แล้ววัด peak RSS ของ process
+#   copy   : แบบเดิม (st.cache_data คืนสำเนาที่ unpickle ใหม่ + df.copy() + กรองด้วย mask + เพิ่มคอลัมน์คะแนน)
+#   shared : ชุดข้อมูลเดียวใช้ร่วมกัน กรองเป็น row id และดึงเฉพาะคอลัมน์ที่แสดง
+# แต่ละกรณีรันใน subprocess แยกกัน เพื่อให้ ru_maxrss เป็น peak ของกรณีนั้นจริง ๆ
+#
+#   python benchmarks/bench_sessions.py --rows 200000 --sessions 1 5 10 20
+import argparse
+import pickle
+import resource
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Linux: KB
+
+
+def _load(rows: int):
+    import pandas as pd
+    from snapshot import load_snapshot
+    from data_store import split_frame
+    from data_loader import CORE_COLUMNS
+    core, text = load_snapshot(str(ROOT / 'mpxo.xlsx'))
+    base = pd.concat([core, text.frame], axis=1)
+    base = pd.concat([base] * (rows // len(base) + 1), ignore_index=True).iloc[:rows].sort_values('date_col', kind='stable', ignore_index=True)
+    return split_frame(base, CORE_COLUMNS)
+
+
+def _session_copy(shared, text, index, year):
+    import pandas as pd
+    from scoring import OVERALL_SCORE_COL
+    df = pickle.loads(pickle.dumps(pd.concat([shared, text.frame], axis=1), protocol=pickle.HIGHEST_PROTOCOL))
+    df_filtered = df.copy()
+    df_filtered = df_filtered[df_filtered['ปี'] == year]
+    df_filtered['คะแนนความพึงพอใจ'] = df_filtered[OVERALL_SCORE_COL].astype('Float64')
+    return df, df_filtered
+
+
+def _session_shared(shared, text, index, year):
+    from filter_engine import take_rows
+    rows = index.select(year=year)
+    return rows, take_rows(shared, rows, ['หน่วยงาน', 'รายละเอียดความไม่พึงพอใจ'], text)
+
+
+def _worker(mode: str, rows: int, sessions: int) -> None:
+    from filter_engine import FilterIndex
+    shared, text = _load(rows)
+    index = FilterIndex(shared)
+    year = int(shared['ปี'].iloc[0])
+    base = _peak_rss_mb()
+    session = _session_copy if mode == 'copy' else _session_shared
+    states = [None] * sessions
+    barrier = threading.Barrier(sessions)
+
+    def run(i):
+        states[i] = session(shared, text, index, year)
+        barrier.wait()  # ให้ทุก session ถือ state ไว้พร้อมกัน
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(sessions)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    print(f"{base:.1f} {_peak_rss_mb():.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Peak RSS with N concurrent dashboard sessions")
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 5, 10, 20])
+    parser.add_argument('--worker', nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        mode, rows, sessions = args.worker
+        _worker(mode, int(rows), int(sessions))
+        return
+
+    print(f"rows={args.rows:,}")
+    print(f"{'mode':<8}{'sessions':>9}{'base MB':>10}{'peak MB':>10}{'MB/session':>12}")
+    for mode in ('copy', 'shared'):
+        for n in args.sessions:
+            out = subprocess.run([sys.executable, __file__, '--worker', mode, str(args.rows), str(n)],
+                                 capture_output=True, text=True, check=True).stdout.split()
+            base, peak = float(out[-2]), float(out[-1])
+            print(f"{mode:<8}{n:>9}{base:>10.1f}{peak:>10.1f}{(peak - base) / n:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+# ==============================================================================
+# SYNTHETIC SURVEY GENERATOR
+# ==============================================================================
+# สร้างไฟล์ CSV หน้าตาเดียวกับที่ export จาก Google Forms/Sheets ของแบบประเมิน OPD:
+# หัวตารางภาษาไทยตรงกับ COLUMN_MAPPING, คำตอบ Likert หลายรูปแบบ (รวมแบบมีช่องว่างนำหน้า
+# ตาม LIKERT_MAP), 'ประทับเวลา' รูปแบบของชีต (d/m/yyyy H:MM:SS) เรียงตามเวลา
+# --be-share กำหนดสัดส่วนแถวที่ปีเป็น พ.ศ. (ชีตที่ตั้ง locale ไทย) ไว้ทดสอบ timestamps.py
+# สร้างทีละ chunk จึงทำได้ตั้งแต่หลักพันถึงหลายล้านแถวโดยหน่วยความจำไม่โตตามจำนวนแถว
+#
+#   python benchmarks/synth.py --rows 1000000 --out /tmp/synth_1m.csv
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from data_loader import COLUMN_MAPPING  # noqa: E402
+from scoring import LIKERT_MAP, OVERALL_COL, satisfaction_cols  # noqa: E402
+
+CHUNK_ROWS = 250_000
+TIMESTAMP_COL = 'ประทับเวลา'
+# ชื่อคอลัมน์กลาง -> หัวตารางจริงของแบบฟอร์ม
+HEADERS = {v: k for k, v in COLUMN_MAPPING.items()}
+
+DEPARTMENTS = [
+    'หน่วยตรวจรักษาทั่วไป', 'หน่วยตรวจหู คอ จมูก', 'หน่วยตรวจสุขภาพจิต', 'หน่วยตรวจเด็กสุขภาพดี',
+    'หน่วยตรวจศัลยศาสตร์', 'หน่วยตรวจรักษาเด็กป่วย', 'หน่วยตรวจอายุรศาสตร์', 'หน่วยตรวจตา',
+    'หน่วยตรวจออร์โธปิดิกส์', 'หน่วยตรวจสูตินรีเวชวิทยา', 'หน่วยตรวจหัวใจและหลอดเลือด',
+    'หน่วยตรวจอุบัติเหตุและฉุกเฉิน', 'MFU(แพทย์แผนจีน)', 'คลินิกพิเศษนอกเวลา (SMC)',
+    'หน่วยแพทย์บูรณาการ', 'หน่วยเคมีบาบัด11B',
+]
+# ตัวเลือก -> น้ำหนัก (ไม่จำเป็นต้องรวมเป็น 1); None = ไม่ตอบ
+CHOICES = {
+    'ประเภทการมา': {'มากกว่า 1 ครั้ง': 80, 'ครั้งแรก': 16, None: 1},
+    'สุขภาพโดยรวม': {'ปานกลาง': 52, 'สุขภาพดี': 35, 'สุขภาพไม่ดี': 11, None: 2},
+    'เหตุผลที่เลือก': {'สะดวก': 3, 'ใกล้บ้าน': 3, 'มาตามนัด': 3, 'บริการดี': 2, 'ใช้สิทธิได้': 2, '-': 3, None: 17},
+    'เพศ': {'หญิง': 55, 'ชาย': 45, None: 10},
+    'อายุ': {'ต่ำกว่า 18 ปี': 12, 'อายุ 18 - 35 ปี': 26, 'อายุ 36 - 51 ปี': 24, 'อายุ 52 - 70 ปี': 28, '70 ปี ขึ้นไป': 6},
+    'ภูมิลำเนา': {'ภายในจังหวัดเชียงราย': 80, 'นอกจังหวัดเชียงราย': 3, 'พะเยา': 2, 'เชียงใหม่': 1, None: 9},
+    'อาชีพ': {'นักศึกษา มฟล. ปริญญาตรี': 10, 'ข้าราชการ': 8, 'พนักงาน มฟล.': 6, 'แม่บ้าน': 5, 'ค้าขาย': 5, 'รับจ้าง': 8, 'เกษตรกร': 6, None: 18},
+    'สิทธิการรักษา': {'กรมบัญชีกลาง': 16, 'บัตรทอง': 14, 'เบิกตรง': 5, 'ชำระเอง': 5, 'ข้าราชการ': 5, 'ประกันสังคม': 8, None: 8},
+    'กลับมารับบริการหรือไม่': {'ใช่': 99, 'ไม่ใช่': 1},
+    'แนะนำผู้อื่นหรือไม่': {'ใช่': 99, 'ไม่ใช่': 1},
+    'ความคาดหวังต่อบริการ': {'บริการรวดเร็ว': 4, 'ลดระยะเวลารอคอย': 4, 'เจ้าหน้าที่ยิ้มแย้ม บริการดี': 3, 'ที่จอดรถเพียงพอ': 2, 'ดีอยู่แล้ว': 3, None: 30},
+}
+# คำตอบ Likert: ทั้งแบบปกติและแบบมีช่องว่างนำหน้า (ตามที่พบใน export จริง)
+LIKERT_WEIGHTS = {5: 60, 4: 32, 3: 6, 2: 1, 1: 1}
+LIKERT_MISSING = 0.03
+COMPLAINT_RATE = 0.06
+COMPLAINTS = ['รอนาน', 'รอใบนัดนาน', 'ที่จอดรถไม่พอ', 'เจ้าหน้าที่พูดไม่สุภาพ', 'ห้องน้ำไม่สะอาด', 'รอพบแพทย์นานเกิน {n} ชั่วโมง', 'คิวห้อง {n} ช้ามาก']
+
+
+def _pick(rng: np.random.Generator, options: dict, size: int) -> np.ndarray:
+    values = np.array(list(options), dtype=object)
+    weights = np.array(list(options.values()), dtype=float)
+    return values[rng.choice(len(values), size=size, p=weights / weights.sum())]
+
+
+def _likert(rng: np.random.Generator, size: int) -> np.ndarray:
+    scores = np.array(list(LIKERT_WEIGHTS))
+    weights = np.array(list(LIKERT_WEIGHTS.values()), dtype=float)
+    score = scores[rng.choice(len(scores), size=size, p=weights / weights.sum())]
+    labels = {s: [k for k, v in LIKERT_MAP.items() if v == s] for s in scores}
+    out = np.empty(size, dtype=object)
+    variant = rng.integers(0, 2, size=size)
+    for s in scores:
+        for j, label in enumerate(labels[s]):
+            out[(score == s) & (variant == j % 2)] = label
+    out[rng.random(size) < LIKERT_MISSING] = None
+    return out
+
+
+def _sheet_dates(ts: pd.DatetimeIndex, be=None) -> pd.Series:
+    # วันที่แบบชีต: 3/10/2025 (วัน/เดือน/ปี ไม่เติม 0); be: แถวที่เขียนปีเป็น พ.ศ.
+    year = pd.Series(ts.year)
+    if be is not None:
+        year = year.where(~be, year + 543)
+    return pd.Series(ts.day).astype(str) + '/' + pd.Series(ts.month).astype(str) + '/' + year.astype(str)
+
+
+def _sheet_timestamps(ts: pd.DatetimeIndex, be=None) -> pd.Series:
+    # 'ประทับเวลา' ของ Google Sheets: 3/10/2025 9:05:07
+    two = lambda a: pd.Series(a).astype(str).str.zfill(2)
+    return _sheet_dates(ts, be) + ' ' + pd.Series(ts.hour).astype(str) + ':' + two(ts.minute) + ':' + two(ts.second)
+
+
+def generate_chunk(rng: np.random.Generator, size: int, start: pd.Timestamp, end: pd.Timestamp, be_share: float = 0.0) -> pd.DataFrame:
+    # แถวในช่วง [start, end) เรียงตามเวลา
+    span = (end - start).total_seconds()
+    ts = start + pd.to_timedelta(np.sort(rng.random(size)) * span, unit='s')
+    ts = pd.DatetimeIndex(ts).floor('s')
+    be = rng.random(size) < be_share if be_share else None
+    cols = {TIMESTAMP_COL: _sheet_timestamps(ts, be).to_numpy(dtype=object)}
+    dept_w = 1.0 / np.arange(1, len(DEPARTMENTS) + 1)  # หน่วยงานใหญ่ตอบมากกว่า
+    cols['หน่วยงาน'] = np.array(DEPARTMENTS, dtype=object)[rng.choice(len(DEPARTMENTS), size=size, p=dept_w / dept_w.sum())]
+    for col in ('ประเภทการมา', 'สุขภาพโดยรวม', 'เหตุผลที่เลือก', 'เพศ', 'อายุ', 'ภูมิลำเนา', 'อาชีพ', 'สิทธิการรักษา'):
+        cols[col] = _pick(rng, CHOICES[col], size)
+    cols['วันที่รับบริการ'] = _sheet_dates(ts).to_numpy(dtype=object)
+    cols[OVERALL_COL] = _likert(rng, size)
+    for q in satisfaction_cols:
+        cols[q] = _likert(rng, size)
+    cols['กลับมารับบริการหรือไม่'] = _pick(rng, CHOICES['กลับมารับบริการหรือไม่'], size)
+    cols['แนะนำผู้อื่นหรือไม่'] = _pick(rng, CHOICES['แนะนำผู้อื่นหรือไม่'], size)
+    complained = rng.random(size) < COMPLAINT_RATE
+    cols['มีความไม่พึงพอใจหรือไม่'] = np.where(complained, 'มี', 'ไม่มี').astype(object)
+    detail = np.array(COMPLAINTS, dtype=object)[rng.integers(0, len(COMPLAINTS), size=size)]
+    nums = rng.integers(1, 10, size=size).astype(str)
+    detail = np.array([d.format(n=n) for d, n in zip(detail[complained], nums[complained])], dtype=object)
+    cols['รายละเอียดความไม่พึงพอใจ'] = np.full(size, None, dtype=object)
+    cols['รายละเอียดความไม่พึงพอใจ'][complained] = detail
+    cols['ความคาดหวังต่อบริการ'] = _pick(rng, CHOICES['ความคาดหวังต่อบริการ'], size)
+    df = pd.DataFrame(cols)
+    # หัวตารางจริงของแบบฟอร์ม เรียงตามลำดับใน COLUMN_MAPPING
+    return df.rename(columns=HEADERS)[[TIMESTAMP_COL, *COLUMN_MAPPING]]
+
+
+def generate(rows: int, seed: int = 0, start='2023-01-01', end='2025-12-31', be_share: float = 0.0) -> pd.DataFrame:
+    return pd.concat(list(_chunks(rows, seed, start, end, be_share)), ignore_index=True)
+
+
+def _chunks(rows: int, seed: int, start, end, be_share: float = 0.0):
+    rng = np.random.default_rng(seed)
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    # ช่วงเวลาของแต่ละ chunk ตามสัดส่วนจำนวนแถว ความหนาแน่นของคำตอบจึงสม่ำเสมอตลอดช่วง
+    for lo in range(0, rows, CHUNK_ROWS):
+        hi = min(rows, lo + CHUNK_ROWS)
+        yield generate_chunk(rng, hi - lo, start + (end - start) * (lo / rows), start + (end - start) * (hi / rows), be_share)
+
+
+def write_csv(path, rows: int, seed: int = 0, start='2023-01-01', end='2025-12-31', be_share: float = 0.0) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for i, chunk in enumerate(_chunks(rows, seed, start, end, be_share)):
+        chunk.to_csv(path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a Google-Form-shaped OPD survey CSV")
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--start', default='2023-01-01')
+    parser.add_argument('--end', default='2025-12-31')
+    parser.add_argument('--be-share', type=float, default=0.0, help="สัดส่วนแถวที่ปีเป็น พ.ศ.")
+    parser.add_argument('--out', required=True)
+    args = parser.parse_args()
+    write_csv(args.out, args.rows, args.seed, args.start, args.end, args.be_share)
+    print(f"{args.rows:,} rows -> {args.out}")
+
+
+if __name__ == '__main__':
+    main()
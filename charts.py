@@ -0,0 +1,73 @@
+# ==============================================================================
+# CHART FIGURES (memoized)
+# ==============================================================================
+# การสร้าง go.Figure (validate ทุก property) แพงกว่าการส่งไปแสดงผลหลายเท่า
+# จึง cache figure ตามค่าที่แสดงจริง (ปัดตามจำนวนทศนิยมที่แสดง) ระดับ process:
+# rerun ที่ตัวเลขไม่เปลี่ยน หรือ session อื่นที่เลือกตัวกรองเดียวกัน ใช้ figure เดิม
+# figure ที่คืนไปใช้ร่วมกัน ห้ามแก้ไข (st.plotly_chart ไม่แก้ไข figure ที่ส่งเข้าไป)
+from functools import lru_cache
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+_MARGIN = dict(t=10, b=10, l=10, r=10)
+_SCORE_STEPS = [{'range': [1, 2], 'color': '#DC2626'}, {'range': [2, 3], 'color': '#EA580C'}, {'range': [3, 4], 'color': '#F59E0B'}, {'range': [4, 5], 'color': '#16A34A'}]
+
+
+@lru_cache(maxsize=512)
+def _score_gauge(avg: float, height: int) -> go.Figure:
+    fig = go.Figure(go.Indicator(mode="gauge+number", value=avg, number={'valueformat': '.2f'}, gauge={'axis': {'range': [1, 5]}, 'bar': {'color': '#111827'}, 'steps': _SCORE_STEPS, 'threshold': {'line': {'color': '#111827', 'width': 2}, 'thickness': 0.6, 'value': avg}}))
+    fig.update_layout(margin=_MARGIN, height=height)
+    return fig
+
+
+def score_gauge(avg, height=200) -> go.Figure:
+    return _score_gauge(round(float(avg), 2), int(height))
+
+
+@lru_cache(maxsize=512)
+def _percent_gauge(pct: float, height: int, mode: str) -> go.Figure:
+    colors = ['#DC2626', '#EA580C', '#F59E0B', '#16A34A'] if mode == 'high_good' else ['#16A34A', '#F59E0B', '#EA580C', '#DC2626']
+    ranges = [[0, 50], [50, 65], [65, 80], [80, 100]] if mode == 'high_good' else [[0, 5], [5, 10], [10, 20], [20, 100]]
+    steps = [{'range': r, 'color': c} for r, c in zip(ranges, colors)]
+    fig = go.Figure(go.Indicator(mode="gauge+number", value=pct, number={'suffix': '%', 'valueformat': '.1f'}, gauge={'axis': {'range': [0, 100]}, 'bar': {'color': '#111827'}, 'steps': steps, 'threshold': {'line': {'color': '#111827', 'width': 2}, 'thickness': 0.6, 'value': pct}}))
+    fig.update_layout(margin=_MARGIN, height=height)
+    return fig
+
+
+def percent_gauge(pct, height=200, mode='high_good') -> go.Figure:
+    return _percent_gauge(round(float(pct), 1), int(height), mode)
+
+
+@lru_cache(maxsize=256)
+def _distribution_bar(counts: tuple) -> go.Figure:
+    rc = pd.DataFrame({'คะแนน': range(1, len(counts) + 1), 'จำนวน': counts})
+    return px.bar(rc, x='คะแนน', y='จำนวน', title='Distribution (1-5)')
+
+
+def distribution_bar(rc: pd.DataFrame) -> go.Figure:
+    # rc จาก aggregates.cell_distribution
+    return _distribution_bar(tuple(int(c) for c in rc['จำนวน']))
+
+
+@lru_cache(maxsize=128)
+def _trend_chart(x: tuple, n: tuple, value: tuple, moving: tuple, band_x: tuple, lo: tuple, hi: tuple, unit: str, height: int) -> go.Figure:
+    fig = go.Figure([
+        go.Scatter(x=band_x + band_x[::-1], y=hi + lo[::-1], fill='toself', fillcolor='rgba(99,102,241,0.15)', line={'width': 0},
+                   hoverinfo='skip', name='95% CI'),
+        go.Scatter(x=x, y=value, mode='lines+markers', name='ค่าในช่วง', line={'color': '#6366F1'}, customdata=n,
+                   hovertemplate=f'%{{y:.2f}}{unit} (n=%{{customdata:,}})<extra></extra>'),
+        go.Scatter(x=x, y=moving, mode='lines', name='ค่าเฉลี่ยเคลื่อนที่', line={'color': '#111827', 'dash': 'dash'},
+                   hovertemplate=f'%{{y:.2f}}{unit}<extra></extra>'),
+    ])
+    fig.update_layout(margin=_MARGIN, height=height, legend={'orientation': 'h', 'y': -0.15}, hovermode='x unified')
+    return fig
+
+
+def trend_chart(series: pd.DataFrame, unit: str = '', height: int = 380) -> go.Figure:
+    # series จาก trends.trend_series; ช่วงที่ไม่มีข้อมูล (NaN) เส้นขาด แถบ CI วาดเฉพาะช่วงที่คำนวณได้
+    values = lambda s, c: tuple(None if pd.isna(v) else round(float(v), 3) for v in s[c])
+    band = series.dropna(subset=['ต่ำสุด', 'สูงสุด'])
+    return _trend_chart(tuple(series['ช่วง']), tuple(int(v) for v in series['n']), values(series, 'ค่า'), values(series, 'ค่าเฉลี่ยเคลื่อนที่'),
+                        tuple(band['ช่วง']), values(band, 'ต่ำสุด'), values(band, 'สูงสุด'), unit, int(height))
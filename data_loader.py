@@ -0,0 +1,147 @@
+# ==============================================================================
+# DATA LOADING AND PREPARATION
+# ==============================================================================
+# อ่านไฟล์/ข้อมูลดิบ แล้วเตรียม schema กลางของ dashboard: เปลี่ยนชื่อคอลัมน์,
+# แยกส่วนของวันที่ และคำนวณคะแนน Likert ครั้งเดียวต่อการโหลด
+import logging
+from typing import Any
+
+import pandas as pd
+
+import perf
+from scoring import SCORE_COLUMNS, add_score_columns
+from timestamps import parse_timestamps
+
+logger = logging.getLogger('mpx_opd.data_loader')
+
+# เพิ่มเลขนี้เมื่อ prepare_frame เปลี่ยน schema เพื่อให้ store/snapshot ที่เก็บไว้ถูกสร้างใหม่
+SCHEMA_VERSION = 6
+
+# ----------------- Mapping ชื่อคอลัมน์ (OPD) -----------------
+COLUMN_MAPPING = {
+    'หน่วยงานที่ท่านเข้ารับบริการ/ ต้องการประเมิน (เพื่อสะท้อนกลับหน่วยงานโดยตรง)': 'หน่วยงาน',
+    '1. ท่านมาใช้บริการ': 'ประเภทการมา',
+    '2. ท่านคิดว่าสุขภาพโดยรวมของท่าน (ณ ตอนนี้) เป็นอย่างไร': 'สุขภาพโดยรวม',
+    '3. เหตุผลที่เลือกใช้บริการ': 'เหตุผลที่เลือก',
+    'ส่วนที่ 1 ข้อมูลทั่วไปของผู้ตอบแบบประเมิน\n1. เพศ': 'เพศ',
+    '2. อายุ': 'อายุ',
+    '3. ภูมิลำเนา': 'ภูมิลำเนา',
+    '4. อาชีพ': 'อาชีพ',
+    '5. สิทธิในการรักษา': 'สิทธิการรักษา',
+    '6. วันที่มารับบริการ': 'วันที่รับบริการ',
+    'ความพึงพอใจต่อบริการของโรงพยาบาลในภาพรวม': 'ความพึงพอใจโดยรวม',
+    'แบบประเมิน [1.ขั้นตอนการติดต่อและเข้ารับการรักษาในโรงพยาบาล มีความสะดวกเพียงใด]': 'Q1_ความสะดวกขั้นตอน',
+    'แบบประเมิน [2.ขั้นตอนการนัดหมายเพื่อเข้ารับบริการ มีความสะดวกเพียงใด]': 'Q2_ความสะดวกนัดหมาย',
+    'แบบประเมิน [3.ท่านรู้สึกว่าระยะเวลารอคอยเพื่อพบแพทย์เหมาะสมเพียงใด]': 'Q3_ระยะเวลารอคอย',
+    'แบบประเมิน [4.ในการรับบริการครั้งนี้ ทีมผู้รักษา(แพทย์ พยาบาลและเจ้าหน้าที่) รับฟังและเปิดโอกาสให้ท่านซักถามข้อสงสัยได้มากน้อยเพียงใด]': 'Q4_การรับฟัง',
+    'แบบประเมิน [5. ในการรับบริการครั้งนี้ พยาบาลและเจ้าหน้าที่ให้ข้อมูลเกี่ยวกับขั้นตอนการรับบริการได้ชัดเจนเพียงใด]': 'Q5_ความชัดเจนข้อมูล',
+    'แบบประเมิน [6. ในการรับบริการครั้งนี้ ท่านรู้สึกว่าบุคลากรทุกคนดูแลท่านอย่างเท่าเทียมและให้เกียรติหรือไม่]': 'Q6_ความเท่าเทียม',
+    'แบบประเมิน [7. โรงพยาบาลมีความสะอาด และมีสิ่งอำนวยความ4เพียงพอต่อความต้องการของท่าน]': 'Q7_ความสะอาดและสิ่งอำนวยความสะดวก',
+    'แบบประเมิน [8. ก่อนรับบริการหรือการทำหัตถการ ท่านได้รับข้อมูลเกี่ยวกับค่าใช้จ่ายที่อาจเกิดขึ้น ชัดเจนเพียงใด]': 'Q8_ข้อมูลค่าใช้จ่าย',
+    'แบบประเมิน [9. ท่านได้รับข้อมูลการรักษา อาการแทรกซ้อนระหว่างการรักษาพยาบาล]': 'Q9_ข้อมูลการรักษา',
+    'แบบประเมิน [10. ท่านได้รับคำแนะนำอย่างชัดเจน ถึงอาการผิดปกติ ที่ต้องกลับมาพบแพทย์ และการมาตรวจตามนัด]': 'Q10_คำแนะนำกลับบ้าน',
+    '1. หากท่านมีอาการเจ็บป่วย ท่านจะพิจารณากลับมารับบริการที่โรงพยาบาลแห่งนี้หรือไม่': 'กลับมารับบริการหรือไม่',
+    '2. หากมีโอกาสท่านจะแนะนำผู้อื่นให้มารับบริการที่โรงพยาบาลแห่งนี้หรือไม่': 'แนะนำผู้อื่นหรือไม่',
+    '3. ท่านมีความไม่พึงพอใจในการมาใช้บริการที่โรงพยาบาลนี้หรือไม่': 'มีความไม่พึงพอใจหรือไม่',
+    '(หากมี) ความไม่พึงพอใจกรุณาระบุรายละเอียด เพื่อเป็นประโยชน์ในการปรับปรุง': 'รายละเอียดความไม่พึงพอใจ',
+    'ความคาดหวังต่อบริการของโรงพยาบาลในภาพรวม': 'ความคาดหวังต่อบริการ'
+}
+
+# หัวตารางของแบบฟอร์มรุ่นเก่า/ไซต์อื่น -> ชื่อคอลัมน์กลาง ใช้เฉพาะเมื่อไม่มีคอลัมน์ตาม COLUMN_MAPPING
+# ไม่รวมหัวข้อ 1.-10. ที่ไม่มี 'แบบประเมิน [...]' นำหน้า: เป็นมาตรวัดคนละชุด (สะดวกมาก/สะดวก ...)
+# กับ LIKERT_MAP ถ้านำมาคิดคะแนนจะได้ค่าผิด
+COLUMN_ALIASES = {
+    '2. ท่านคิดว่าสุขภาพโดยรวมของท่านเป็นอย่างไร': 'สุขภาพโดยรวม',
+    '3. เหตุผลที่เลือกใช้บริการครั้งนี้': 'เหตุผลที่เลือก',
+    '4. อายุ': 'อายุ',
+    '5. ภูมิลำเนา': 'ภูมิลำเนา',
+    '6. อาชีพ': 'อาชีพ',
+    '7. สิทธิในการรักษา': 'สิทธิการรักษา',
+    '8. วันที่มารับบริการ': 'วันที่รับบริการ',
+    'ส่วนที่ 2 ความพึงพอใจต่อบริการของโรงพยาบาลในภาพรวม': 'ความพึงพอใจโดยรวม',
+}
+XLSX_MAGIC = b'PK\x03\x04'
+
+# ----------------- Compact schema -----------------
+# คอลัมน์ที่มีชุดคำตอบจำกัด -> category (เก็บเป็นรหัส int ขนาดเล็ก + ตารางคำตอบ)
+CATEGORICAL_COLS = [
+    'หน่วยงาน', 'ประเภทการมา', 'สุขภาพโดยรวม', 'เพศ', 'อายุ', 'ภูมิลำเนา', 'อาชีพ', 'สิทธิการรักษา',
+    'กลับมารับบริการหรือไม่', 'แนะนำผู้อื่นหรือไม่', 'มีความไม่พึงพอใจหรือไม่',
+]
+TIME_COLS = ['date_col', 'ปี', 'ไตรมาส', 'เดือน']
+# คอลัมน์ที่ dashboard ใช้ทุก rerun; คอลัมน์อื่น (ข้อความอิสระ, คอลัมน์ที่ไม่รู้จัก) โหลดแบบ lazy
+CORE_COLUMNS = TIME_COLS + CATEGORICAL_COLS + list(SCORE_COLUMNS.values())
+
+
+def _is_xlsx(source: Any) -> bool:
+    # ดูจากไบต์แรกของไฟล์ (zip) ไม่ใช่นามสกุล: export เก่าบางไฟล์เป็น XLSX ที่ตั้งชื่อเป็น .csv
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            return f.read(len(XLSX_MAGIC)) == XLSX_MAGIC
+    pos = source.tell()
+    head = source.read(len(XLSX_MAGIC))
+    source.seek(pos)
+    return head == XLSX_MAGIC
+
+
+def read_source(source: Any, **read_kwargs) -> pd.DataFrame:
+    with perf.stage('read'):
+        if _is_xlsx(source):
+            return pd.read_excel(source, **read_kwargs)
+        return pd.read_csv(source, **read_kwargs)
+
+
+def _header(c) -> str:
+    return str(c).replace('\r\n', '\n').strip()
+
+
+def rename_columns(df: pd.DataFrame) -> pd.DataFrame:
+    names = [COLUMN_MAPPING.get(_header(c), _header(c)) for c in df.columns]
+    present = set(names)
+    for i, name in enumerate(names):
+        alias = COLUMN_ALIASES.get(name)
+        if alias is not None and alias not in present:
+            names[i] = alias
+            present.add(alias)
+    return df.set_axis(names, axis=1)
+
+
+def add_time_fields(df: pd.DataFrame) -> pd.DataFrame:
+    if 'ประทับเวลา' in df.columns:
+        date_col, unparsed = parse_timestamps(df['ประทับเวลา'])
+        if unparsed:
+            logger.warning("ข้าม %d แถวที่อ่าน 'ประทับเวลา' ไม่ได้", unparsed)
+            perf.count('timestamps', 'unparsed', rows=unparsed)
+        df = df.assign(date_col=date_col)
+        # เรียงตามเวลา: ตัวกรองช่วงเวลาใน filter_engine ใช้ binary search บนคอลัมน์นี้
+        df = df.dropna(subset=['date_col']).sort_values('date_col', kind='stable', ignore_index=True)
+        df['เดือน'] = df['date_col'].dt.month.astype('int8')
+        df['ไตรมาส'] = df['date_col'].dt.quarter.astype('int8')
+        df['ปี'] = df['date_col'].dt.year.astype('int16')
+        df.attrs['unparsed_dates'] = unparsed # ไปเก็บใน meta ของ store (snapshot/sheet_sync)
+    else:
+        df = df.assign(date_col=pd.NaT)
+        df['เดือน'] = pd.array([pd.NA] * len(df), dtype='Int8')
+        df['ไตรมาส'] = pd.array([pd.NA] * len(df), dtype='Int8')
+        df['ปี'] = pd.array([pd.NA] * len(df), dtype='Int16')
+    return df
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    # เก็บเฉพาะคะแนน int8 (0 = ไม่มีคำตอบ) ไม่เก็บข้อความคำตอบ Likert ซ้ำ
+    df = df.drop(columns=[c for c in SCORE_COLUMNS if c in df.columns])
+    categorical = {c: df[c].astype('category') for c in CATEGORICAL_COLS if c in df.columns}
+    return df.assign(**categorical)
+
+
+def prepare_frame(df: pd.DataFrame) -> pd.DataFrame:
+    # แต่ละขั้นแยกเป็นฟังก์ชัน เพื่อให้ benchmarks/bench_pipeline.py จับเวลาทีละขั้นได้
+    with perf.stage('rename', rows=len(df)):
+        df = rename_columns(df)
+    with perf.stage('dates', rows=len(df)):
+        df = add_time_fields(df)
+    # ----------------- Likert scores (ครั้งเดียวต่อการโหลด) -----------------
+    with perf.stage('scoring', rows=len(df)):
+        df = add_score_columns(df)
+    with perf.stage('compact', rows=len(df)):
+        return compact_frame(df)
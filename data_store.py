@@ -0,0 +1,172 @@
+# ==============================================================================
+# LOCAL DATA STORE
+# ==============================================================================
+# เก็บข้อมูลที่ parse แล้วลงดิสก์ (Feather/Arrow IPC) พร้อมไฟล์ meta (JSON)
+# เพื่อให้การโหลดครั้งถัดไปไม่ต้อง parse ข้อมูลดิบซ้ำ เวลาอ่านกลับจะแยกคอลัมน์หลัก
+# (category/int ขนาดเล็ก) ออกจากคอลัมน์ข้อความ ซึ่งแปลงเป็น pandas เมื่อถูกใช้จริงเท่านั้น
+import json
+import os
+import threading
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+from pandas.api.types import infer_dtype
+
+import perf
+
+CACHE_DIR = Path(os.environ.get('MPX_OPD_CACHE_DIR', Path(__file__).resolve().parent / '.cache'))
+MAX_SEGMENTS = 32
+
+
+def store_paths(name: str) -> tuple[Path, Path]:
+    # (ไฟล์ข้อมูล, ไฟล์ meta) ของ store ชื่อ name
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    return CACHE_DIR / f'{name}.feather', CACHE_DIR / f'{name}.json'
+
+
+def _replace_atomic(path: Path, write) -> None:
+    # เขียนลงไฟล์ชั่วคราวแล้วค่อยสลับ เพื่อไม่ให้ผู้อ่านเห็นไฟล์ที่เขียนไม่เสร็จ
+    tmp = path.with_name(f'.{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _arrow_safe(df: pd.DataFrame) -> pd.DataFrame:
+    # Arrow ต้องการชนิดเดียวต่อคอลัมน์: คอลัมน์ object ที่ปนตัวเลข/ข้อความ (เช่นจาก XLSX) แปลงเป็นข้อความ
+    # คอลัมน์ category ดูที่ตารางคำตอบ (categories) แทน
+    mixed = {}
+    for c in df.columns:
+        s = df[c]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            if infer_dtype(s.cat.categories, skipna=True) not in ('string', 'empty'):
+                s = s.astype(object)
+                mixed[c] = s.where(s.isna(), s.astype(str)).astype('category')
+        elif s.dtype == object and infer_dtype(s, skipna=True) not in ('string', 'empty'):
+            mixed[c] = s.where(s.isna(), s.astype(str))
+    return df.assign(**mixed) if mixed else df
+
+
+def _to_arrow(df: pd.DataFrame) -> pa.Table:
+    # รหัสของคอลัมน์ dictionary (category) เป็น int32 เสมอ: pandas เลือกชนิดเล็กสุด (int8) ตามจำนวน
+    # คำตอบตอนเขียน ส่วนต่อท้ายที่มีคำตอบใหม่ (เช่น อาชีพ/สิทธิการรักษาที่พิมพ์เอง) รวมกันแล้วเกิน 127
+    # จะ unify_dictionaries ไม่ได้ อ่านกลับเป็น pandas รหัสยังถูกย่อเป็นชนิดเล็กสุดเหมือนเดิม
+    table = pa.Table.from_pandas(_arrow_safe(df.reset_index(drop=True)), preserve_index=False)
+    fields = [f.with_type(pa.dictionary(pa.int32(), f.type.value_type, f.type.ordered)) if pa.types.is_dictionary(f.type) else f
+              for f in table.schema]
+    return table.cast(pa.schema(fields, metadata=table.schema.metadata))
+
+
+def _write_table(table: pa.Table, path: Path) -> None:
+    # ไม่บีบอัด เพื่อให้การอ่านกลับ memory-map ไฟล์ได้โดยตรง
+    _replace_atomic(path, lambda p: feather.write_feather(table, p, compression='uncompressed'))
+
+
+def segment_path(path: Path, n: int) -> Path:
+    # ไฟล์ส่วนต่อท้ายลำดับที่ n ของ store (n เริ่มที่ 1; ไฟล์ path เองคือส่วนฐาน)
+    return path.with_name(f'{path.stem}.{n}{path.suffix}')
+
+
+def _remove_segments(path: Path) -> None:
+    for seg in path.parent.glob(f'{path.stem}.*{path.suffix}'):
+        if seg.stem.rsplit('.', 1)[-1].isdigit():
+            seg.unlink(missing_ok=True)
+
+
+def _read_table(path: Path, segments: int = 0) -> pa.Table:
+    tables = [feather.read_table(p, memory_map=True) for p in [path] + [segment_path(path, n) for n in range(1, segments + 1)]]
+    return tables[0] if len(tables) == 1 else pa.concat_tables(tables).unify_dictionaries()
+
+
+def write_frame(df: pd.DataFrame, path: Path) -> None:
+    # เขียนทั้งชุดเป็นส่วนฐานใหม่ ส่วนต่อท้ายเดิม (ถ้ามี) ไม่ใช้แล้ว
+    with perf.stage('store_write', rows=len(df)):
+        _write_table(_to_arrow(df), path)
+        _remove_segments(path)
+
+
+def append_frame(df: pd.DataFrame, path: Path, segments: int = 0) -> int:
+    # เขียนแถวใหม่เป็นไฟล์ส่วนต่อท้ายแยก ไม่อ่าน/เขียนแถวเดิมซ้ำ; schema ต้องตรงกับส่วนฐาน
+    # คืนจำนวนส่วนต่อท้ายหลังเขียน ครบ MAX_SEGMENTS จึงรวมทุกส่วนเป็นไฟล์ฐานไฟล์เดียว
+    # (เขียนใหม่ทั้งหมดครั้งเดียวทุก MAX_SEGMENTS รอบ ไม่ให้การอ่านต้องเปิดไฟล์มากเกินไป)
+    with perf.stage('store_append', rows=len(df), segment=segments + 1):
+        with pa.memory_map(str(path)) as src:
+            schema = pa.ipc.open_file(src).schema
+        new = _to_arrow(df)
+        if new.column_names != schema.names:
+            raise ValueError("คอลัมน์ของข้อมูลใหม่ไม่ตรงกับที่เก็บไว้")
+        new = new.cast(schema)
+        if segments + 1 < MAX_SEGMENTS:
+            _write_table(new, segment_path(path, segments + 1))
+            return segments + 1
+        _write_table(pa.concat_tables([_read_table(path, segments), new]).unify_dictionaries(), path)
+        _remove_segments(path)
+        return 0
+
+
+class LazyFrame:
+    # คอลัมน์ที่ยังไม่แปลงเป็น pandas: Arrow table (memory-map จากไฟล์ จึงไม่กิน heap)
+    # แปลงเป็น DataFrame ครั้งแรกที่มีการใช้งาน แล้วเก็บไว้ใช้ร่วมกัน
+    def __init__(self, table: pa.Table):
+        self._table = table
+        self._frame = None
+        self._lock = threading.Lock()
+
+    @property
+    def columns(self) -> list:
+        return self._table.column_names
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        if self._frame is None:
+            with self._lock:
+                if self._frame is None:
+                    with perf.stage('text_materialize', rows=self._table.num_rows):
+                        self._frame = self._table.to_pandas()
+        return self._frame
+
+    def take(self, rows) -> 'LazyFrame':
+        # แถวตาม row id (ลำดับเดียวกับคอลัมน์หลักที่ถูกคัด/เรียงใหม่)
+        return LazyFrame(self._table.take(pa.array(rows, type=pa.int64())))
+
+
+def concat_lazy(frames: list, order=None) -> LazyFrame:
+    # ต่อคอลัมน์ข้อความของหลายแหล่งตามลำดับ (คอลัมน์ไม่ครบ -> null) แล้วเรียงตาม order ถ้ามี
+    tables = [f._table for f in frames]
+    try:
+        table = pa.concat_tables(tables, promote_options='permissive')
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # ชนิดข้อมูลของคอลัมน์เดียวกันขัดกัน (เช่น ตัวเลขกับข้อความ) -> ใช้ข้อความทั้งหมด
+        tables = [t.cast(pa.schema([pa.field(f.name, pa.string()) for f in t.schema])) for t in tables]
+        table = pa.concat_tables(tables, promote_options='default')
+    if order is not None:
+        table = table.take(pa.array(order, type=pa.int64()))
+    return LazyFrame(table)
+
+
+def _split(table: pa.Table, core_columns: list) -> tuple[pd.DataFrame, LazyFrame]:
+    core = [c for c in table.column_names if c in core_columns]
+    rest = [c for c in table.column_names if c not in core_columns]
+    return table.select(core).to_pandas(), LazyFrame(table.select(rest))
+
+
+def read_split(path: Path, core_columns: list, segments: int = 0) -> tuple[pd.DataFrame, LazyFrame]:
+    # (คอลัมน์หลักเป็น DataFrame, คอลัมน์ที่เหลือแบบ lazy) จากไฟล์เดียวกัน row id จึงตรงกัน
+    with perf.stage('store_read', segments=segments):
+        return _split(_read_table(path, segments), core_columns)
+
+
+def split_frame(df: pd.DataFrame, core_columns: list) -> tuple[pd.DataFrame, LazyFrame]:
+    return _split(_to_arrow(df), core_columns)
+
+
+def read_meta(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def write_meta(meta: dict, path: Path) -> None:
+    _replace_atomic(path, lambda p: p.write_text(json.dumps(meta, ensure_ascii=False), encoding='utf-8'))
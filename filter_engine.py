@@ -0,0 +1,149 @@
+# ==============================================================================
+# ROW FILTER ENGINE (shared, read-only dataset)
+# ==============================================================================
+# ชุดข้อมูลหลักถูกใช้ร่วมกันทุก session (อ่านอย่างเดียว) การกรองจึงคืนค่าเป็น
+# row-id array แทนการสร้าง DataFrame ใหม่ และดึงเฉพาะคอลัมน์ที่จะแสดงจริงเท่านั้น
+#
+# FilterIndex สร้างครั้งเดียวต่อการโหลดข้อมูล:
+#   - ช่วงเวลา (ปี/ไตรมาส/เดือน/ช่วงวันที่ใด ๆ): ข้อมูลเรียงตาม date_col อยู่แล้ว
+#     (ดู prepare_frame) จึงเป็นช่วง row id ต่อเนื่อง [lo, hi) หาได้ด้วย binary search
+#   - หน่วยงาน: inverted index หน่วยงาน -> row id ที่เรียงแล้ว ตัดเฉพาะช่วงเวลาที่เลือก
+#     ด้วย binary search อีกครั้ง (ได้ view ไม่ต้อง copy เมื่อเลือกหน่วยงานเดียว) เลือกหลายหน่วยงาน
+#     ได้ posting ที่ตัดแล้วต่อกันทีละหน่วยงาน (ไม่เรียงรวมใหม่ทุกครั้งที่ rerun)
+#   - สถานพยาบาล (เมื่อรวมหลายแหล่ง): inverted index สถานพยาบาล -> row id และ (สถานพยาบาล,
+#     หน่วยงาน) -> row id สร้างไว้พร้อมกัน ตัวกรองสถานพยาบาลจึงเป็นการ lookup แบบเดียวกับหน่วยงาน
+#     ไม่ต้องตัดกัน (intersect) ทุก rerun และไม่ต้องมีชุดข้อมูลแยกของแต่ละแห่ง
+import numpy as np
+import pandas as pd
+
+from aggregates import ALL_DEPARTMENTS, ALL_PERIODS
+
+
+def period_bounds(year=ALL_PERIODS, quarter=ALL_PERIODS, month=ALL_PERIODS):
+    # (เริ่ม, สิ้นสุด) แบบ half-open ของปี/ไตรมาส/เดือนที่เลือก; ไม่เลือกปี -> (None, None)
+    if year == ALL_PERIODS:
+        return None, None
+    year = int(year)
+    if month != ALL_PERIODS:
+        start = pd.Timestamp(year=year, month=int(month), day=1)
+        return start, start + pd.DateOffset(months=1)
+    if quarter != ALL_PERIODS:
+        start = pd.Timestamp(year=year, month=3 * int(quarter) - 2, day=1)
+        return start, start + pd.DateOffset(months=3)
+    return pd.Timestamp(year=year, month=1, day=1), pd.Timestamp(year=year + 1, month=1, day=1)
+
+
+def split_months(start, end) -> tuple[list, list]:
+    # ช่วง [start, end) -> (เดือนเต็มในรูปคีย์ของ cube [(ปี, ALL_PERIODS, เดือน)], ช่วงเศษต้น/ท้ายเดือน [(เริ่ม, สิ้นสุด)])
+    # เดือนเต็มอ่านจาก aggregate cube ได้ เหลือสแกนแถวเฉพาะช่วงเศษ
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    lo = start.to_period('M').to_timestamp()
+    if lo < start:
+        lo += pd.DateOffset(months=1)
+    hi = end.to_period('M').to_timestamp()
+    if lo >= hi:
+        return [], ([(start, end)] if start < end else [])
+    months = [(m.year, ALL_PERIODS, m.month) for m in pd.date_range(lo, hi, freq='MS', inclusive='left')]
+    return months, [(a, b) for a, b in ((start, lo), (hi, end)) if a < b]
+
+
+def _group(codes: np.ndarray, labels) -> dict:
+    # label -> row id ที่เรียงแล้วของแถวที่มีรหัสนั้น (รหัส -1 ไม่อยู่ใน index)
+    order = np.argsort(codes, kind='stable').astype(np.int64)  # row id เรียงภายในแต่ละค่า
+    bounds = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+    return {v: order[bounds[i]:bounds[i + 1]] for i, v in enumerate(labels)}
+
+
+def _postings(values: pd.Series) -> dict:
+    # ค่า -> row id ที่เรียงแล้ว (ค่าว่างไม่อยู่ใน index)
+    return _group(*pd.factorize(values))
+
+
+def _pair_postings(a: pd.Series, b: pd.Series) -> dict:
+    # (ค่าใน a, ค่าใน b) -> row id ที่เรียงแล้ว เฉพาะคู่ที่มีแถวจริง (ค่าว่างฝั่งใดฝั่งหนึ่งไม่อยู่ใน index)
+    ca, ua = pd.factorize(a)
+    cb, ub = pd.factorize(b)
+    pair = np.where((ca < 0) | (cb < 0), -1, ca.astype(np.int64) * len(ub) + cb)
+    codes, pairs = pd.factorize(pair)
+    postings = _group(codes, [(ua[k // len(ub)], ub[k % len(ub)]) if k >= 0 else None for k in pairs])
+    postings.pop(None, None)
+    return postings
+
+
+def _clip(posting: np.ndarray, lo: int, hi: int) -> np.ndarray:
+    return posting[np.searchsorted(posting, lo):np.searchsorted(posting, hi)]
+
+
+class FilterIndex:
+    def __init__(self, df: pd.DataFrame, site_col: str = None):
+        self.size = len(df)
+        dates = df['date_col'] if 'date_col' in df.columns else pd.Series(pd.NaT, index=df.index)
+        self._dates = dates.to_numpy(dtype='datetime64[ns]')
+        self._has_dates = self.size > 0 and not np.isnat(self._dates).any()
+        if self._has_dates and not (self._dates[1:] >= self._dates[:-1]).all():
+            raise ValueError("FilterIndex ต้องการข้อมูลที่เรียงตาม date_col")
+
+        self._departments = _postings(df['หน่วยงาน']) if 'หน่วยงาน' in df.columns else {}
+        self._sites, self._site_departments = {}, {}
+        if site_col is not None and site_col in df.columns:
+            self._sites = _postings(df[site_col])
+            if 'หน่วยงาน' in df.columns:
+                self._site_departments = _pair_postings(df[site_col], df['หน่วยงาน'])
+
+    @property
+    def min_date(self):
+        return pd.Timestamp(self._dates[0]) if self._has_dates else pd.NaT
+
+    @property
+    def max_date(self):
+        return pd.Timestamp(self._dates[-1]) if self._has_dates else pd.NaT
+
+    def _row_range(self, start=None, end=None) -> tuple[int, int]:
+        lo, hi = 0, self.size
+        if not self._has_dates:
+            return lo, hi
+        if start is not None:
+            lo = int(np.searchsorted(self._dates, np.datetime64(pd.Timestamp(start), 'ns'), side='left'))
+        if end is not None:
+            hi = int(np.searchsorted(self._dates, np.datetime64(pd.Timestamp(end), 'ns'), side='left'))
+        return lo, max(lo, hi)
+
+    def site_rows(self, site) -> np.ndarray:
+        # row id ทั้งหมดของสถานพยาบาล site (เรียงตามเวลา)
+        return self._sites.get(site, np.empty(0, dtype=np.int64))
+
+    def rows(self, departments=None, start=None, end=None, site=None) -> np.ndarray:
+        # row id ของหน่วยงานที่เลือกในช่วง [start, end); departments=None คือทุกหน่วยงาน
+        # site=None คือทุกสถานพยาบาล เรียงตามเวลา ยกเว้นหลายหน่วยงาน: เรียงตามเวลาภายในแต่ละหน่วยงาน
+        # ต่อกันตามลำดับใน departments (ผู้ใช้ที่ต้องการลำดับเวลารวม เช่น page_rows จัดการเอง)
+        lo, hi = self._row_range(start, end)
+        if departments is None:
+            return np.arange(lo, hi) if site is None else _clip(self.site_rows(site), lo, hi)
+        if isinstance(departments, str):
+            departments = [departments]
+        parts = []
+        for d in departments:
+            posting = self._departments.get(d) if site is None else self._site_departments.get((site, d))
+            if posting is not None:
+                parts.append(_clip(posting, lo, hi))
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def select(self, department=ALL_DEPARTMENTS, year=ALL_PERIODS, quarter=ALL_PERIODS, month=ALL_PERIODS, site=None) -> np.ndarray:
+        # คีย์แบบเดียวกับ sidebar / aggregate cube
+        start, end = period_bounds(year, quarter, month)
+        return self.rows(None if department == ALL_DEPARTMENTS else department, start, end, site)
+
+
+def take_rows(df: pd.DataFrame, rows: np.ndarray, columns: list, text=None) -> pd.DataFrame:
+    # คัดลอกเฉพาะแถว/คอลัมน์ที่ต้องแสดง ไม่แตะคอลัมน์อื่นของชุดข้อมูลที่ใช้ร่วมกัน
+    # คอลัมน์ที่ไม่อยู่ใน df ดึงจาก text (data_store.LazyFrame ของชุดข้อมูลเดียวกัน) ถ้ามี
+    cols = [c for c in columns if c in df.columns]
+    out = df.iloc[rows, df.columns.get_indexer(cols)]
+    extra = [c for c in columns if c not in df.columns and text is not None and c in text.columns]
+    if not extra:
+        return out
+    t = text.frame
+    out = pd.concat([out, t.iloc[rows, t.columns.get_indexer(extra)].set_axis(out.index)], axis=1)
+    return out[[c for c in columns if c in out.columns]]
@@ -0,0 +1,106 @@
+# ==============================================================================
+# METRICS ENGINE (ไม่ขึ้นกับ Streamlit)
+# ==============================================================================
+# ตัวเลขที่ dashboard แสดง (จำนวนผู้ตอบ, คะแนนพึงพอใจเฉลี่ย, สุขภาพโดยรวม, % ความตั้งใจ,
+# ค่าเฉลี่ยรายหัวข้อ Q1-Q10) คำนวณจากช่องของ aggregate cube แบบ vectorized:
+#   compute_metrics : หลายช่องพร้อมกัน (ทุกหน่วยงาน x ทุกช่วงเวลา) สำหรับรายงาน (report.py)
+#   cell_metrics    : ช่องเดียว สำหรับหน้า dashboard
+# ทั้งสองใช้โค้ดชุดเดียวกัน ตัวเลขในรายงานกับบนหน้าจอจึงตรงกันเสมอ
+import numpy as np
+import pandas as pd
+
+from aggregates import ALL_DEPARTMENTS, ALL_PERIODS, HEALTH_PREFIX
+from scoring import SCORE_COLUMNS, OVERALL_SCORE_COL, satisfaction_cols
+
+RESPONSES = 'จำนวนผู้ตอบ'
+AVG_SATISFACTION = 'คะแนนพึงพอใจเฉลี่ย'
+HEALTH_MODE = 'สุขภาพผู้ป่วยโดยรวม'
+INTENT_METRICS = {
+    'กลับมารับบริการหรือไม่': '% กลับมาใช้บริการ',
+    'แนะนำผู้อื่นหรือไม่': '% การบอกต่อ',
+    'มีความไม่พึงพอใจหรือไม่': '% ไม่พึงพอใจ',
+}
+# ระดับเวลาของรายงาน -> เงื่อนไขบนคีย์ (ปี, ไตรมาส, เดือน) ของ cube
+LEVELS = ('all', 'year', 'quarter', 'month')
+
+
+def n_col(metric: str) -> str:
+    # คอลัมน์จำนวนผู้ตอบของ metric นั้น (ตัวหารของค่าเฉลี่ย/เปอร์เซ็นต์)
+    return f'{metric} (n)'
+
+
+def _col(cells: pd.DataFrame, name: str) -> np.ndarray:
+    return cells[name].to_numpy(dtype=float) if name in cells.columns else np.zeros(len(cells))
+
+
+def _ratio(num: np.ndarray, den: np.ndarray, scale=1.0) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(den > 0, num / den * scale, np.nan)
+
+
+def compute_metrics(cells: pd.DataFrame) -> pd.DataFrame:
+    # cells: แถวของ cube (หรือผลจาก aggregate_rows) -> ตาราง metric ที่ index เดียวกัน
+    out = {RESPONSES: _col(cells, 'n').astype(np.int64)}
+
+    n = _col(cells, f'{OVERALL_SCORE_COL}__n')
+    out[AVG_SATISFACTION] = _ratio(_col(cells, f'{OVERALL_SCORE_COL}__sum'), n)
+    out[n_col(AVG_SATISFACTION)] = n.astype(np.int64)
+
+    # ค่าที่พบบ่อยที่สุด; เท่ากันเลือกตามลำดับตัวอักษร
+    health_cols = sorted(c for c in cells.columns if c.startswith(HEALTH_PREFIX))
+    if health_cols:
+        tallies = cells[health_cols].to_numpy(dtype=float)
+        labels = np.array([c[len(HEALTH_PREFIX):] for c in health_cols], dtype=object)
+        out[HEALTH_MODE] = np.where(tallies.max(axis=1) > 0, labels[tallies.argmax(axis=1)], "N/A")
+    else:
+        out[HEALTH_MODE] = np.full(len(cells), "N/A", dtype=object)
+
+    for col, label in INTENT_METRICS.items():
+        n = _col(cells, f'{col}__n')
+        out[label] = _ratio(_col(cells, f'{col}__yes'), n, 100)
+        out[n_col(label)] = n.astype(np.int64)
+
+    for q in satisfaction_cols:
+        score_col = SCORE_COLUMNS[q]
+        n = _col(cells, f'{score_col}__n')
+        out[q] = _ratio(_col(cells, f'{score_col}__sum'), n)
+        out[n_col(q)] = n.astype(np.int64)
+    return pd.DataFrame(out, index=cells.index)
+
+
+def cell_metrics(cell: pd.Series) -> dict:
+    return compute_metrics(cell.to_frame().T).iloc[0].to_dict()
+
+
+def metrics_table(cube: pd.DataFrame, level: str = 'month', departments=None) -> pd.DataFrame:
+    # ทุกหน่วยงาน (รวม ALL_DEPARTMENTS) x ทุกช่วงเวลาของ level ในครั้งเดียว จาก cube ที่สรุปไว้แล้ว
+    if level not in LEVELS:
+        raise ValueError(f"level ต้องเป็นหนึ่งใน {LEVELS}")
+    if cube.empty:
+        return pd.DataFrame()
+    keys = cube.index.to_frame(index=False)
+    # แถวที่ไม่มีวันที่ (ปี/ไตรมาส/เดือนเป็น NA) นับอยู่ใน 'all' เท่านั้น
+    year, quarter, month = (keys[k].to_numpy(dtype=float, na_value=np.nan) for k in ('ปี', 'ไตรมาส', 'เดือน'))
+    mask = {
+        'all': year == ALL_PERIODS,
+        'year': (year > ALL_PERIODS) & (quarter == ALL_PERIODS) & (month == ALL_PERIODS),
+        'quarter': quarter > ALL_PERIODS,
+        'month': month > ALL_PERIODS,
+    }[level]
+    mask &= keys['หน่วยงาน'].notna().to_numpy()
+    if departments is not None:
+        mask &= keys['หน่วยงาน'].isin([ALL_DEPARTMENTS, *departments]).to_numpy()
+    cells = cube[mask]
+    table = compute_metrics(cells)
+    table = table[table[RESPONSES] > 0].reset_index()
+    if level in ('all', 'year', 'month'):
+        table = table.drop(columns='ไตรมาส')
+    if level in ('all', 'year', 'quarter'):
+        table = table.drop(columns='เดือน')
+    if level == 'all':
+        table = table.drop(columns='ปี')
+    # ภาพรวมทั้งหมดขึ้นก่อนในแต่ละช่วงเวลา แล้วเรียงตามชื่อหน่วยงาน
+    period = [c for c in ('ปี', 'ไตรมาส', 'เดือน') if c in table.columns]
+    order = table['หน่วยงาน'] != ALL_DEPARTMENTS
+    return (table.assign(_o=order).sort_values([*period, '_o', 'หน่วยงาน'], kind='stable')
+            .drop(columns='_o').reset_index(drop=True))
@@ -0,0 +1,123 @@
+# ==============================================================================
+# INSTRUMENTATION
+# ==============================================================================
+# จับเวลาขั้นตอนต่าง ๆ ของการโหลดข้อมูล (fetch, read, rename, dates, scoring, store ...)
+# และนับ cache hit/miss แบบทั้ง process; ทุกขั้นถูกเก็บลง ring buffer เสมอ (ต้นทุนแค่
+# perf_counter + append) ส่วนการเขียน log แบบ JSON บรรทัดละเหตุการณ์ทำเฉพาะเมื่อเปิด
+# โหมด instrumentation ทั้ง process ด้วย env MPX_OPD_PROFILE=1; การเปิดหน้าเว็บด้วย ?profile=1
+# เปิดแค่ panel และ log ของ rerun ใน session นั้น (RenderTimer(profiling=True)) ไม่กระทบ session อื่น
+#
+# RenderTimer จับเวลาแต่ละส่วนของหน้า dashboard ในหนึ่ง rerun แบบจับรอบ (lap):
+# เรียก lap('ชื่อส่วน') เมื่อจบแต่ละส่วน ได้เวลาตั้งแต่ lap ก่อนหน้า
+# Dashboard เก็บผลไว้ใน st.session_state['render_timings'] ดู benchmarks/bench_render.py
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+ENV_VAR = 'MPX_OPD_PROFILE'
+MAX_EVENTS = 200
+
+logger = logging.getLogger('mpx_opd.perf')
+
+_enabled = False
+_events = deque(maxlen=MAX_EVENTS)
+_counters = Counter()
+_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def _setup_logging() -> None:
+    # handler/level ตั้งที่ logger 'mpx_opd.perf' เท่านั้น ไม่แตะ root logger ของทั้ง process
+    # (?profile=1 ของ session หนึ่งจึงไม่เปลี่ยน logging ของ session/ไลบรารีอื่น)
+    with _lock:
+        if not logger.handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+            logger.propagate = False
+        logger.setLevel(logging.INFO)
+
+
+def enable(on: bool = True) -> None:
+    # เปิดทั้ง process; env var เปิดไว้ตั้งแต่เริ่ม
+    global _enabled
+    if on:
+        _setup_logging()
+    _enabled = on
+
+
+if os.environ.get(ENV_VAR, '').strip().lower() not in ('', '0', 'false', 'no'):
+    enable()
+
+
+def _emit(event: dict) -> None:
+    with _lock:
+        _events.append(event)
+    if _enabled:
+        logger.info(json.dumps(event, ensure_ascii=False, default=str))
+
+
+@contextmanager
+def stage(name: str, **fields):
+    t0 = time.perf_counter()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        _emit({'event': 'stage', 'stage': name, 'ms': round((time.perf_counter() - t0) * 1000, 3), 'ok': ok,
+               'thread': threading.current_thread().name, 'ts': time.time(), **fields})
+
+
+def count(name: str, outcome: str, **fields) -> None:
+    with _lock:
+        _counters[(name, outcome)] += 1
+    _emit({'event': 'count', 'name': name, 'outcome': outcome, 'ts': time.time(), **fields})
+
+
+def counters() -> dict:
+    # {(ชื่อ, ผลลัพธ์): จำนวน} ตั้งแต่เริ่ม process
+    with _lock:
+        return dict(_counters)
+
+
+def recent_stages(limit: int = 50) -> list:
+    with _lock:
+        return [e for e in _events if e['event'] == 'stage'][-limit:]
+
+
+class RenderTimer:
+    def __init__(self, profiling: bool = False):
+        # profiling: เปิด instrumentation เฉพาะ rerun นี้ (เช่น ?profile=1) แม้ทั้ง process ปิดอยู่
+        self.profiling = profiling or _enabled
+        if self.profiling:
+            _setup_logging()
+        self.timings = {}
+        self._last = time.perf_counter()
+
+    def lap(self, name: str) -> None:
+        now = time.perf_counter()
+        self.timings[name] = self.timings.get(name, 0.0) + (now - self._last) * 1000
+        self._last = now
+
+    @contextmanager
+    def measure(self, name: str):
+        # เวลาสะสมของงานย่อยที่กระจายอยู่หลายที่ (เช่น st.plotly_chart ทุกครั้ง) ไม่กระทบ lap
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + (time.perf_counter() - t0) * 1000
+
+    def log(self, **fields) -> None:
+        # หนึ่งบรรทัดต่อ rerun (เฉพาะเมื่อเปิด instrumentation)
+        if self.profiling:
+            logger.info(json.dumps({'event': 'rerun', 'ts': time.time(), 'ms': {k: round(v, 3) for k, v in self.timings.items()}, **fields},
+                                   ensure_ascii=False, default=str))
@@ -0,0 +1,105 @@
+# ==============================================================================
+# BACKGROUND REFRESH (stale-while-revalidate)
+# ==============================================================================
+# ดึงข้อมูลจาก Google Sheets เป็นรอบ ๆ ใน thread เบื้องหลัง แล้วสลับชุดข้อมูลใหม่
+# เข้าไปทีเดียว (แทนที่ reference) หน้า dashboard อ่าน snapshot ล่าสุดที่ดึงสำเร็จ
+# ได้ทันทีโดยไม่ต้องรอ network; ถ้าดึงไม่สำเร็จจะลองใหม่แบบ exponential backoff
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import pandas as pd
+
+from data_store import LazyFrame
+from filter_engine import FilterIndex
+from text_index import TextIndexes
+from trends import TrendStore
+
+REFRESH_INTERVAL = 300  # วินาที
+RETRY_DELAY = 15
+MAX_RETRY_DELAY = 1800
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    df: pd.DataFrame
+    text: LazyFrame  # คอลัมน์ข้อความ (แปลงเป็น pandas เมื่อถูกใช้ครั้งแรก)
+    cube: pd.DataFrame
+    index: FilterIndex
+    comments: TextIndexes
+    trends: TrendStore  # ผลรวมรายสัปดาห์/รายเดือน (ต่อยอดจาก snapshot ก่อนหน้าได้)
+    source: str
+    loaded_at: float  # epoch seconds ของข้อมูลชุดนี้
+    sites: dict = field(default_factory=dict)  # สถานพยาบาล -> SiteView ของทุกแหล่งที่มีข้อมูล
+    status: tuple = ()  # sources.SourceStatus ของแต่ละแหล่ง
+
+    @property
+    def age(self) -> float:
+        return max(0.0, time.time() - self.loaded_at)
+
+
+@dataclass(frozen=True)
+class SiteView:
+    # ผลสรุปของสถานพยาบาลหนึ่งในชุดข้อมูลรวม; แถวของแห่งนั้นเลือกผ่าน Snapshot.index (site=...)
+    # จึงไม่มีสำเนาของข้อมูล/คอลัมน์ข้อความ/index แยกต่อแห่ง
+    cube: pd.DataFrame
+    trends: TrendStore
+
+
+class DatasetRefresher:
+    # fetch(snapshot ก่อนหน้าหรือ None) -> Snapshot ใหม่; ใช้ของเดิมต่อยอดส่วนที่คำนวณแบบ incremental ได้
+    def __init__(self, fetch: Callable[[Optional[Snapshot]], Snapshot], interval: float = REFRESH_INTERVAL,
+                 retry_delay: float = RETRY_DELAY, max_retry_delay: float = MAX_RETRY_DELAY):
+        self._fetch = fetch
+        self.interval = interval
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._snapshot: Optional[Snapshot] = None
+        self.last_error: Optional[BaseException] = None
+        self.failures = 0
+        self._attempted = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='dataset-refresher', daemon=True)
+
+    def start(self) -> 'DatasetRefresher':
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def current(self) -> Optional[Snapshot]:
+        # อ่าน reference เดียว จึงได้ snapshot ที่สมบูรณ์เสมอ (ไม่ต้อง lock)
+        return self._snapshot
+
+    def wait_first_attempt(self, timeout: float) -> bool:
+        # ใช้ตอนเริ่ม process เท่านั้น: รอรอบแรกไม่เกิน timeout แล้วค่อยใช้ไฟล์สำรอง
+        return self._attempted.wait(timeout)
+
+    def _next_delay(self) -> float:
+        if self.failures == 0:
+            return self.interval
+        return min(self.max_retry_delay, self.retry_delay * 2 ** (self.failures - 1))
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._snapshot = self._fetch(self._snapshot)
+                self.last_error = None
+                self.failures = 0
+            except Exception as e:
+                self.last_error = e
+                self.failures += 1
+            self._attempted.set()
+            self._stop.wait(self._next_delay())
+
+
+def format_age(seconds: float) -> str:
+    if seconds < 60:
+        return "เมื่อสักครู่"
+    if seconds < 3600:
+        return f"เมื่อ {int(seconds // 60)} นาทีที่แล้ว"
+    if seconds < 86400:
+        return f"เมื่อ {int(seconds // 3600)} ชั่วโมงที่แล้ว"
+    return f"เมื่อ {int(seconds // 86400)} วันที่แล้ว"
@@ -0,0 +1,65 @@
+# ==============================================================================
+# BATCH REPORT (CLI)
+# ==============================================================================
+# สร้างตาราง metric ของทุกหน่วยงาน x ทุกช่วงเวลาโดยไม่ต้องเปิด dashboard
+# ใช้ข้อมูลชุดเดียวกับ dashboard (snapshot ของไฟล์ / sync ของ Google Sheets) และ
+# metrics.compute_metrics ชุดเดียวกัน ตัวเลขจึงตรงกับหน้าจอ
+#
+#   python report.py mpxo.xlsx --level month --out report_month.csv
+#   python report.py mpxo.xlsx --level quarter --format json --out report_q.json
+#   python report.py "https://docs.google.com/.../export?format=csv&gid=..." --level year
+#   python report.py sources.json --level month   (ทุกสถานพยาบาลรวมกัน ดู sources.py)
+import argparse
+import sys
+
+import pandas as pd
+
+from aggregates import build_cube
+from metrics import LEVELS, metrics_table
+from sheet_sync import sync_sheet
+from snapshot import load_snapshot
+from sources import read_sources, load_sources
+
+
+def load_core(source: str) -> pd.DataFrame:
+    if source.endswith('.json'):
+        return load_sources(read_sources(source))[0]
+    if source.startswith(('http://', 'https://')):
+        return sync_sheet(source)[0]
+    return load_snapshot(source)[0]
+
+
+def build_report(source: str, level: str = 'month', departments=None) -> pd.DataFrame:
+    return metrics_table(build_cube(load_core(source)), level, departments)
+
+
+def write_report(table: pd.DataFrame, out, fmt: str) -> None:
+    if fmt == 'json':
+        table.to_json(out, orient='records', force_ascii=False, indent=2)
+    else:
+        # utf-8-sig ให้ Excel เปิดภาษาไทยได้ถูกต้อง
+        table.to_csv(out, index=False, encoding='utf-8-sig')
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="รายงาน metric ของทุกหน่วยงาน x ทุกช่วงเวลา")
+    parser.add_argument('source', help="ไฟล์ XLSX/CSV, URL export CSV ของ Google Sheets หรือรายการแหล่งข้อมูล (.json)")
+    parser.add_argument('--level', choices=LEVELS, default='month')
+    parser.add_argument('--department', action='append', help="เลือกเฉพาะหน่วยงาน (ใส่ซ้ำได้); ไม่ใส่ = ทุกหน่วยงาน")
+    parser.add_argument('--format', choices=('csv', 'json'), help="ไม่ใส่ = ดูจากนามสกุลของ --out (ค่าเริ่มต้น csv)")
+    parser.add_argument('--out', help="ไฟล์ผลลัพธ์; ไม่ใส่ = stdout")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ('json' if args.out and args.out.endswith('.json') else 'csv')
+    table = build_report(args.source, args.level, args.department)
+    if args.out:
+        write_report(table, args.out, fmt)
+        print(f"{len(table):,} แถว -> {args.out}", file=sys.stderr)
+    elif fmt == 'json':
+        sys.stdout.write(table.to_json(orient='records', force_ascii=False, indent=2) + '\n')
+    else:
+        table.to_csv(sys.stdout, index=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# ==============================================================================
+# LIKERT SCORING (vectorized)
+# ==============================================================================
+# แปลงคำตอบ Likert ทั้งคอลัมน์ครั้งเดียวต่อการโหลดข้อมูล แทนการเรียก
+# normalize_to_1_5 ทีละเซลล์ผ่าน Series.apply ทุกครั้งที่ Streamlit rerun:
+# คำนวณเฉพาะค่าที่ไม่ซ้ำกัน (distinct raw strings) แล้ว map กลับด้วย code array
+import re
+
+import numpy as np
+import pandas as pd
+
+LIKERT_MAP = {'มากที่สุด': 5, 'มาก': 4, 'ปานกลาง': 3, 'น้อย': 2, 'น้อยมาก': 1, ' มากที่สุด': 5, ' มาก': 4, ' ปานกลาง': 3, ' น้อย': 2, ' น้อยมาก': 1}
+
+# คะแนนเก็บเป็น int8 โดยใช้ 0 แทนค่าว่าง (ไม่มีคำตอบ / แปลงไม่ได้)
+MISSING_SCORE = 0
+
+OVERALL_COL = 'ความพึงพอใจโดยรวม'
+OVERALL_SCORE_COL = 'คะแนนความพึงพอใจ'
+
+satisfaction_cols = {
+    'Q1_ความสะดวกขั้นตอน': '1. ความสะดวกขั้นตอนการติดต่อ',
+    'Q2_ความสะดวกนัดหมาย': '2. ความสะดวกขั้นตอนการนัดหมาย',
+    'Q3_ระยะเวลารอคอย': '3. ความเหมาะสมระยะเวลารอคอย',
+    'Q4_การรับฟัง': '4. การรับฟังและเปิดโอกาสให้ซักถาม',
+    'Q5_ความชัดเจนข้อมูล': '5. ความชัดเจนข้อมูลขั้นตอนบริการ',
+    'Q6_ความเท่าเทียม': '6. การดูแลอย่างเท่าเทียม',
+    'Q7_ความสะอาดและสิ่งอำนวยความสะดวก': '7. ความสะอาดและสิ่งอำนวยความสะดวก',
+    'Q8_ข้อมูลค่าใช้จ่าย': '8. ความชัดเจนข้อมูลค่าใช้จ่าย',
+    'Q9_ข้อมูลการรักษา': '9. ข้อมูลการรักษา/อาการแทรกซ้อน',
+    'Q10_คำแนะนำกลับบ้าน': '10. คำแนะนำเมื่อกลับบ้าน'
+}
+
+# คอลัมน์คำตอบ -> คอลัมน์คะแนน
+SCORE_COLUMNS = {OVERALL_COL: OVERALL_SCORE_COL, **{k: f'คะแนน_{k}' for k in satisfaction_cols}}
+
+
+def normalize_to_1_5(x):
+    if pd.isna(x): return pd.NA
+    s = str(x).strip()
+    if s in LIKERT_MAP: return LIKERT_MAP[s]
+    m = re.search(r'([1-5])', s)
+    if m: return int(m.group(1))
+    for k, v in LIKERT_MAP.items():
+        if k.strip() in s: return v
+    return pd.NA
+
+
+def score_series(series: pd.Series) -> pd.Series:
+    # factorize -> lookup table ของค่าที่ไม่ซ้ำ; code -1 (NaN) ชี้ไปช่องสุดท้ายซึ่งเป็น MISSING_SCORE
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    lut = np.full(len(uniques) + 1, MISSING_SCORE, dtype=np.int8)
+    for i, raw in enumerate(uniques):
+        v = normalize_to_1_5(raw)
+        if not pd.isna(v):
+            lut[i] = v
+    return pd.Series(lut[codes], index=series.index, name=series.name, dtype=np.int8)
+
+
+def add_score_columns(df: pd.DataFrame) -> pd.DataFrame:
+    # เพิ่มคอลัมน์คะแนน (int8) ให้ทุกคอลัมน์ Likert ที่มีในข้อมูล; คะแนนรวมต้องมีเสมอ
+    scores = {}
+    for col, score_col in SCORE_COLUMNS.items():
+        if col in df.columns:
+            scores[score_col] = score_series(df[col])
+        elif col == OVERALL_COL:
+            scores[score_col] = pd.Series(MISSING_SCORE, index=df.index, dtype=np.int8)
+    return df.assign(**scores)
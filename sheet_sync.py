@@ -0,0 +1,129 @@
+# ==============================================================================
+# INCREMENTAL GOOGLE SHEETS SYNC
+# ==============================================================================
+# แบบฟอร์มเป็นแบบต่อท้ายอย่างเดียว (append-only): เก็บข้อมูลที่ parse แล้วไว้ใน
+# data_store และจำขนาด/hash ของ CSV ที่เห็นครั้งล่าสุด ครั้งถัดไปถ้า CSV ใหม่ขึ้นต้น
+# ด้วยไบต์ชุดเดิม จะ parse + normalize เฉพาะส่วนท้ายที่เพิ่มเข้ามา (หลัง 'ประทับเวลา'
+# ล่าสุด) ถ้าข้อมูลเดิมถูกแก้ไข/ลบ จะ parse ใหม่ทั้งหมด
+# แถวใหม่เขียนเป็นไฟล์ส่วนต่อท้ายของ store (ไม่เขียนแถวเดิมซ้ำ ดู data_store.append_frame)
+# lineage (core.attrs['lineage']) เปลี่ยนเฉพาะเมื่อ parse ใหม่ทั้งหมด ผู้ใช้ข้อมูลที่ต่อยอดผลสรุป
+# เดิม (trends.TrendStore.extend) จึงรู้ว่าแถวเดิมยังเหมือนเดิมโดยไม่ต้องเทียบเนื้อหาเอง
+# ส่วนที่ยังเป็น O(ทั้งชีต) ทุกรอบ: ดาวน์โหลด export ทั้งไฟล์ (endpoint ไม่รองรับดึงบางช่วง)
+# และ hash ส่วนต้นเพื่อยืนยันว่าไม่ถูกแก้ ซึ่งเร็วกว่าการ parse มาก
+import hashlib
+import io
+
+import pandas as pd
+import pyarrow as pa
+import requests
+
+import perf
+from data_loader import SCHEMA_VERSION, CORE_COLUMNS, prepare_frame
+from data_store import LazyFrame, store_paths, read_split, write_frame, append_frame, read_meta, write_meta
+
+FETCH_TIMEOUT = 30  # วินาที
+
+
+def fetch_csv(url: str, timeout: float = FETCH_TIMEOUT) -> bytes:
+    with perf.stage('fetch'):
+        resp = requests.get(url, timeout=timeout)
+        resp.raise_for_status()
+        return resp.content
+
+
+def _header_length(payload: bytes) -> int:
+    # หัวตารางของ Google Forms มีขึ้นบรรทัดใหม่ในเครื่องหมายคำพูดได้ จึงหาจุดจบ record
+    # แรกจากขึ้นบรรทัดใหม่ที่อยู่นอก quote (จำนวน '"' ก่อนหน้าเป็นเลขคู่)
+    pos = 0
+    while True:
+        nl = payload.find(b'\n', pos)
+        if nl < 0:
+            return len(payload)
+        if payload.count(b'"', 0, nl) % 2 == 0:
+            return nl + 1
+        pos = nl + 1
+
+
+def _parse(payload: bytes) -> pd.DataFrame:
+    # อ่านทุกคอลัมน์เป็นข้อความ เพื่อให้ชนิดข้อมูลของส่วนที่ parse แยกกันต่อกันได้
+    with perf.stage('read', bytes=len(payload)):
+        df = pd.read_csv(io.BytesIO(payload), dtype=str)
+    return prepare_frame(df)
+
+
+def _read(data_path, segments: int, lineage: str) -> tuple[pd.DataFrame, LazyFrame]:
+    core, text = read_split(data_path, CORE_COLUMNS, segments)
+    core.attrs['lineage'] = lineage
+    return core, text
+
+
+def sync_sheet(url: str, timeout: float = FETCH_TIMEOUT) -> tuple[pd.DataFrame, LazyFrame]:
+    # คืน (คอลัมน์หลัก, คอลัมน์ข้อความแบบ lazy) ดู data_store.read_split
+    payload = fetch_csv(url, timeout)
+    data_path, meta_path = store_paths('gsheet_' + hashlib.sha1(url.encode()).hexdigest()[:12])
+    try:
+        return _sync(url, payload, data_path, meta_path)
+    except (OSError, pa.ArrowException):
+        # อ่าน store เดิมไม่ได้ (ไฟล์เสีย/หาย, ส่วนต่อท้ายรวมกันไม่ได้) -> parse ใหม่ทั้งหมดแล้วเขียนทับ
+        # ไม่อย่างนั้นทุกรอบจะพังที่จุดเดิมและชีตนี้จะไม่กลับมาอีก
+        perf.count('sheet_sync', 'recover')
+        return _sync(url, payload, data_path, meta_path, incremental=False)
+
+
+def _sync(url: str, payload: bytes, data_path, meta_path, incremental: bool = True) -> tuple[pd.DataFrame, LazyFrame]:
+    meta = read_meta(meta_path)
+
+    prefix_len = meta.get('prefix_len', 0)
+    appended_only = (
+        incremental
+        and data_path.exists()
+        and meta.get('version') == SCHEMA_VERSION
+        and 0 < prefix_len <= len(payload)
+        and hashlib.sha256(payload[:prefix_len]).hexdigest() == meta.get('prefix_sha256')
+    )
+
+    segments, lineage = meta.get('segments', 0), meta.get('lineage', '')
+    if appended_only:
+        tail = payload[prefix_len:]
+        if not tail.strip():
+            perf.count('sheet_sync', 'unchanged')
+            return _read(data_path, segments, lineage)
+        new = _parse(payload[:meta['header_len']] + tail)
+        # แถวใหม่ต้องไม่เก่ากว่า 'ประทับเวลา' ล่าสุดที่เคยเห็น ไม่อย่างนั้นถือว่าชีตถูกแก้ไข
+        watermark = pd.Timestamp(meta['watermark']) if meta.get('watermark') else pd.NaT
+        if pd.notna(watermark) and (new['date_col'] < watermark).any():
+            appended_only = False
+        else:
+            try:
+                segments = append_frame(new, data_path, segments)
+            except (ValueError, pa.ArrowException):
+                # schema ของส่วนท้ายต่อกับของเดิมไม่ได้ (เช่น คอลัมน์เปลี่ยน) -> parse ใหม่ทั้งหมด
+                appended_only = False
+            else:
+                perf.count('sheet_sync', 'append', rows=len(new))
+                rows = meta.get('rows', 0) + len(new)
+                unparsed = meta.get('unparsed_dates', 0) + new.attrs.get('unparsed_dates', 0)
+                watermark = max(watermark, new['date_col'].max()) if pd.notna(watermark) else new['date_col'].max()
+
+    if not appended_only:
+        perf.count('sheet_sync', 'full')
+        df = _parse(payload)
+        write_frame(df, data_path)
+        segments, lineage = 0, hashlib.sha256(payload).hexdigest()
+        rows = len(df)
+        unparsed = df.attrs.get('unparsed_dates', 0)
+        watermark = df['date_col'].max() if 'date_col' in df.columns else pd.NaT
+
+    write_meta({
+        'version': SCHEMA_VERSION,
+        'url': url,
+        'prefix_len': len(payload),
+        'prefix_sha256': hashlib.sha256(payload).hexdigest(),
+        'header_len': _header_length(payload),
+        'watermark': watermark.isoformat() if pd.notna(watermark) else None,
+        'rows': rows,
+        'segments': segments,
+        'lineage': lineage,
+        'unparsed_dates': unparsed,
+    }, meta_path)
+    return _read(data_path, segments, lineage)
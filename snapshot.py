@@ -0,0 +1,63 @@
+# ==============================================================================
+# SNAPSHOT CACHE (ไฟล์สำรอง XLSX/CSV)
+# ==============================================================================
+# แปลงไฟล์ต้นทางเป็น Feather ที่ parse วันที่และคะแนน Likert ไว้แล้วเพียงครั้งเดียว
+# ครั้งถัดไปเช็ก mtime/ขนาดไฟล์ (ถูก) ก่อน แล้วจึงเช็ก hash ของเนื้อหา (เมื่อ mtime
+# เปลี่ยน) และสร้าง snapshot ใหม่เฉพาะเมื่อเนื้อหาไฟล์เปลี่ยนจริง
+# lineage (core.attrs['lineage']) คือ hash ของไฟล์ ดู sheet_sync
+import hashlib
+from pathlib import Path
+
+import pandas as pd
+
+import perf
+from data_loader import SCHEMA_VERSION, CORE_COLUMNS, read_source, prepare_frame
+from data_store import LazyFrame, store_paths, read_split, write_frame, read_meta, write_meta
+
+
+def _file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _read(data_path: Path, digest: str) -> tuple[pd.DataFrame, LazyFrame]:
+    core, text = read_split(data_path, CORE_COLUMNS)
+    core.attrs['lineage'] = digest
+    return core, text
+
+
+def load_snapshot(source: str) -> tuple[pd.DataFrame, LazyFrame]:
+    # คืน (คอลัมน์หลัก, คอลัมน์ข้อความแบบ lazy) ดู data_store.read_split
+    src = Path(source).resolve()
+    stat = src.stat()
+    data_path, meta_path = store_paths('snapshot_' + hashlib.sha1(str(src).encode()).hexdigest()[:12])
+    meta = read_meta(meta_path)
+    fresh = data_path.exists() and meta.get('version') == SCHEMA_VERSION
+
+    if fresh and meta.get('size') == stat.st_size and meta.get('mtime_ns') == stat.st_mtime_ns:
+        perf.count('snapshot', 'hit')
+        return _read(data_path, meta.get('sha256', ''))
+
+    digest = _file_sha256(src)
+    if fresh and meta.get('sha256') == digest:
+        # แค่ mtime เปลี่ยน (เช่น copy ไฟล์ทับ) เนื้อหาเดิม -> ใช้ snapshot เดิม
+        write_meta({**meta, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}, meta_path)
+        perf.count('snapshot', 'revalidated')
+        return _read(data_path, digest)
+
+    perf.count('snapshot', 'rebuild')
+    df = prepare_frame(read_source(str(src)))
+    write_frame(df, data_path)
+    write_meta({
+        'version': SCHEMA_VERSION,
+        'source': str(src),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': digest,
+        'rows': len(df),
+        'unparsed_dates': df.attrs.get('unparsed_dates', 0),
+    }, meta_path)
+    return _read(data_path, digest)
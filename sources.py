@@ -0,0 +1,140 @@
+# ==============================================================================
+# DATA SOURCES (หลายสถานพยาบาล / หลายชีต)
+# ==============================================================================
+# แต่ละสถานพยาบาลใช้แบบฟอร์ม OPD ชุดเดียวกันแต่คนละชีต และอาจมีไฟล์ export เก่าเป็นไฟล์สำรอง
+# ดึง + parse ทุกแหล่งพร้อมกันใน thread pool (เวลารวม ~ แหล่งที่ช้าที่สุด ไม่ใช่ผลรวม)
+# แต่ละแหล่งมี timeout ของตัวเอง ถ้าชีตดึงไม่ได้จะใช้ไฟล์สำรองของแหล่งนั้นแทน
+# ผลทุกแหล่งรวมเป็นชุดเดียว (schema เดียวกันจาก data_loader) พร้อมคอลัมน์ SITE_COL
+# เรียงตาม date_col ตามที่ filter_engine ต้องการ
+#
+# รายการแหล่งข้อมูลอ่านจาก JSON (env MPX_OPD_SOURCES, ค่าเริ่มต้น sources.json):
+#   [{"site": "รพ. A", "url": "https://docs.google.com/.../export?format=csv&gid=0",
+#     "path": "site_a.xlsx", "timeout": 20}, {"site": "รพ. B", "path": "site_b.csv"}]
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+import perf
+from data_store import LazyFrame, concat_lazy
+from scoring import SCORE_COLUMNS, MISSING_SCORE
+from sheet_sync import FETCH_TIMEOUT, sync_sheet
+from snapshot import load_snapshot
+
+SITE_COL = 'สถานพยาบาล'
+SOURCES_ENV = 'MPX_OPD_SOURCES'
+SOURCES_FILE = 'sources.json'
+MAX_WORKERS = 8
+LIVE = 'Google Sheets'
+
+
+@dataclass(frozen=True)
+class Source:
+    site: str
+    url: Optional[str] = None  # ลิงก์ export CSV ของ Google Sheets
+    path: Optional[str] = None  # ไฟล์ XLSX/CSV (ไฟล์สำรองเมื่อมี url)
+    timeout: float = FETCH_TIMEOUT
+
+
+@dataclass(frozen=True)
+class SourceStatus:
+    site: str
+    origin: str  # LIVE หรือ 'ไฟล์สำรอง: ...' / 'ไฟล์: ...'; ว่างเมื่อโหลดไม่ได้
+    loaded_at: float  # epoch seconds ของข้อมูล (เวลาที่ดึงชีต หรือ mtime ของไฟล์)
+    rows: int = 0
+    error: Optional[str] = None
+    lineage: str = ''  # คงเดิมตราบที่แถวเดิมของแหล่งไม่เปลี่ยน (ต่อท้ายอย่างเดียว) ดู sheet_sync
+    remote: bool = False  # แหล่งนี้มีชีต (url) ไม่ใช่ไฟล์อย่างเดียว
+
+    @property
+    def live(self) -> bool:
+        return self.origin == LIVE
+
+
+def read_sources(path: Optional[str] = None, default=()) -> tuple:
+    path = path or os.environ.get(SOURCES_ENV, SOURCES_FILE)
+    if not os.path.exists(path):
+        return tuple(default)
+    with open(path, encoding='utf-8') as f:
+        return tuple(Source(**item) for item in json.load(f))
+
+
+def load_source(src: Source, offline: bool = False) -> tuple[pd.DataFrame, LazyFrame, SourceStatus]:
+    # ชีตก่อน (ยกเว้น offline) ไม่ได้จึงใช้ไฟล์; ไม่สำเร็จทั้งคู่ -> raise ข้อผิดพลาดล่าสุด
+    error = None
+    if src.url and not offline:
+        try:
+            with perf.stage('source', site=src.site, kind='sheet'):
+                core, text = sync_sheet(src.url, src.timeout)
+            return core, text, SourceStatus(src.site, LIVE, time.time(), len(core), lineage=core.attrs.get('lineage', ''), remote=True)
+        except Exception as e:
+            error = e
+    if src.path and os.path.exists(src.path):
+        with perf.stage('source', site=src.site, kind='file'):
+            core, text = load_snapshot(src.path)
+        label = 'ไฟล์สำรอง' if src.url else 'ไฟล์'
+        return core, text, SourceStatus(src.site, f"{label}: {os.path.basename(src.path)}", os.path.getmtime(src.path), len(core),
+                                        None if error is None else str(error), core.attrs.get('lineage', ''), bool(src.url))
+    raise error or FileNotFoundError(f"ไม่พบแหล่งข้อมูลของ {src.site}")
+
+
+def _combine(parts: list, sites: list) -> tuple[pd.DataFrame, LazyFrame]:
+    site_dtype = pd.CategoricalDtype(sites)
+    cores = [core.assign(**{SITE_COL: pd.Categorical([site] * len(core), dtype=site_dtype)}) for site, core, _ in parts]
+    columns = list(dict.fromkeys(c for core in cores for c in core.columns))
+    # category ของแต่ละแหล่งต่างกัน: รวมชุดคำตอบก่อนต่อ ไม่อย่างนั้น pandas จะคืนเป็น object
+    dtypes = {}
+    for col in columns:
+        cats = [core[col].cat.categories for core in cores if col in core.columns and isinstance(core[col].dtype, pd.CategoricalDtype)]
+        if cats:
+            dtypes[col] = pd.CategoricalDtype(pd.Index(pd.unique(np.concatenate([c.to_numpy(dtype=object) for c in cats]))))
+    fill = {col: MISSING_SCORE for col in SCORE_COLUMNS.values()}
+    aligned = []
+    for core in cores:
+        core = core.reindex(columns=columns)
+        for col, dtype in dtypes.items():
+            core[col] = core[col].astype(dtype)
+        for col, value in fill.items():
+            if col in core.columns:
+                core[col] = core[col].fillna(value).astype('int8')
+        aligned.append(core)
+    core = pd.concat(aligned, ignore_index=True)
+    order = None
+    if 'date_col' in core.columns:
+        order = np.argsort(core['date_col'].to_numpy(dtype='datetime64[ns]'), kind='stable')  # NaT ไปท้ายสุด
+        core = core.take(order).reset_index(drop=True)
+    # ปี/ไตรมาส/เดือนอาจเป็น Int (มี NA) ในบางแหล่ง -> ใช้ชนิดเดียวกันทั้งชุด
+    for col, dtype in (('เดือน', 'Int8'), ('ไตรมาส', 'Int8'), ('ปี', 'Int16')):
+        if col in core.columns and core[col].isna().any():
+            core[col] = core[col].astype(dtype)
+        elif col in core.columns:
+            core[col] = core[col].astype(dtype.lower())
+    return core, concat_lazy([text for _, _, text in parts], order)
+
+
+def load_sources(sources, offline: bool = False) -> tuple[pd.DataFrame, LazyFrame, list]:
+    # (คอลัมน์หลักของทุกแหล่งรวมกัน, คอลัมน์ข้อความแบบ lazy, SourceStatus ของแต่ละแหล่งตามลำดับ)
+    sources = list(sources)
+    if not sources:
+        raise ValueError("ไม่มีแหล่งข้อมูล")
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(sources)), thread_name_prefix='source') as pool:
+        futures = [pool.submit(load_source, src, offline) for src in sources]
+    parts, statuses = [], []
+    for src, fut in zip(sources, futures):
+        try:
+            core, text, status = fut.result()
+        except Exception as e:
+            statuses.append(SourceStatus(src.site, '', 0.0, 0, str(e), remote=bool(src.url)))
+            continue
+        parts.append((src.site, core, text))
+        statuses.append(status)
+    if not parts:
+        raise RuntimeError("; ".join(f"{s.site}: {s.error}" for s in statuses))
+    with perf.stage('combine_sources', sources=len(parts)):
+        core, text = _combine(parts, list(dict.fromkeys(src.site for src in sources)))
+    return core, text, statuses
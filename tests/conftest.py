@@ -0,0 +1,55 @@
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+import data_store  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    # store ของแต่ละเทสต์แยกกัน ไม่ปน .cache ของเครื่อง
+    path = tmp_path / 'cache'
+    monkeypatch.setattr(data_store, 'CACHE_DIR', path)
+    return path
+
+
+@pytest.fixture(scope='session')
+def survey():
+    # แบบสอบถามสังเคราะห์ (หัวตาราง/คำตอบแบบ export ของ Google Forms) เรียงตามเวลา
+    from synth import generate
+    return generate(600, seed=1)
+
+
+@pytest.fixture
+def sheet():
+    # endpoint export CSV จำลอง: path ใน routes คืน payload ของ path นั้น นอกนั้นคืน payload
+    # (แก้ได้ระหว่างเทสต์) state['url'] / state['base'] คือ URL ของ path เริ่มต้น / ของ server
+    state = {'payload': b'', 'routes': {}}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = state['routes'].get(self.path, state['payload'])
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/csv; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state['base'] = f'http://127.0.0.1:{server.server_port}'
+    state['url'] = state['base'] + '/export?format=csv&gid=0'
+    yield state
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import ALL_DEPARTMENTS, ALL_PERIODS, HEALTH_COL, INTENT_COLS, add_cells, aggregate_rows, build_cube, build_cubes, counts_table, department_n, department_n_rows, lookup, lookup_sum
+from filter_engine import FilterIndex, split_months
+from scoring import SCORE_COLUMNS, OVERALL_SCORE_COL, MISSING_SCORE
+from sheet_sync import _parse
+
+
+@pytest.fixture(scope='module')
+def frame(survey):
+    return _parse(survey.to_csv(index=False).encode('utf-8'))
+
+
+def _direct(df: pd.DataFrame) -> dict:
+    # ผลรวมของแถวคำนวณตรง ๆ (ไม่ผ่าน _row_measures) ไว้เทียบกับช่องของ cube
+    out = {'n': len(df)}
+    for col in SCORE_COLUMNS.values():
+        s = df[col]
+        out[f'{col}__n'] = int((s != MISSING_SCORE).sum())
+        out[f'{col}__sum'] = int(s.astype(int).sum())
+        out[f'{col}__sumsq'] = int((s.astype(int) ** 2).sum())
+    for k in range(1, 6):
+        out[f'{OVERALL_SCORE_COL}__eq{k}'] = int((df[OVERALL_SCORE_COL] == k).sum())
+    for col, val in INTENT_COLS.items():
+        out[f'{col}__yes'] = int((df[col].astype(str).str.strip() == val).sum())
+        out[f'{col}__n'] = int(df[col].notna().sum())
+    for answer, n in df[HEALTH_COL].value_counts().items():
+        out[f'{HEALTH_COL}::{answer}'] = int(n)
+    return out
+
+
+def _check_cell(cell: pd.Series, rows: pd.DataFrame):
+    for name, value in _direct(rows).items():
+        assert int(cell.get(name, 0)) == value, name
+
+
+def test_cube_cells_match_rows(frame):
+    cube = build_cube(frame)
+    top = frame['หน่วยงาน'].value_counts().index[0]
+    for dept in (ALL_DEPARTMENTS, top):
+        in_dept = frame if dept == ALL_DEPARTMENTS else frame[frame['หน่วยงาน'] == dept]
+        _check_cell(lookup(cube, dept), in_dept)
+        for year in sorted(frame['ปี'].unique()):
+            in_year = in_dept[in_dept['ปี'] == year]
+            _check_cell(lookup(cube, dept, year), in_year)
+            for quarter in range(1, 5):
+                _check_cell(lookup(cube, dept, year, quarter), in_year[in_year['ไตรมาส'] == quarter])
+            for month in range(1, 13):
+                _check_cell(lookup(cube, dept, year, ALL_PERIODS, month), in_year[in_year['เดือน'] == month])
+    # ทุกหน่วยงานรวมกัน = ช่องภาพรวม
+    departments = [d for d in frame['หน่วยงาน'].dropna().unique()]
+    pd.testing.assert_series_equal(lookup_sum(cube, departments, [(ALL_PERIODS,) * 3]), lookup(cube).astype(np.int64), check_names=False)
+
+
+def test_site_cubes_match_split_frames(frame):
+    df = frame.assign(site=np.where(np.arange(len(frame)) % 4 == 0, 'B', 'A'))
+    cube, parts = build_cubes(df, 'site')
+    pd.testing.assert_frame_equal(cube, build_cube(frame))
+    for site, part in parts.items():
+        rows = df[df['site'] == site]
+        _check_cell(lookup(part), rows)
+        _check_cell(lookup(part, rows['หน่วยงาน'].iloc[0]), rows[rows['หน่วยงาน'] == rows['หน่วยงาน'].iloc[0]])
+
+
+def _same(cell: pd.Series, expected: pd.Series):
+    pd.testing.assert_series_equal(cell.reindex(expected.index.union(cell.index), fill_value=0),
+                                   expected.reindex(expected.index.union(cell.index), fill_value=0), check_names=False, check_dtype=False)
+
+
+@pytest.mark.parametrize('start, end', [('2024-03-15', '2024-07-02'), ('2024-02-01', '2024-05-01'), ('2024-06-03', '2024-06-20')])
+def test_range_cells_match_rows(frame, start, end):
+    # เดือนเต็มจาก cube + เศษเดือนจากแถว = สรุปจากทุกแถวในช่วง (หน่วยงานเดียว หลายหน่วยงาน และทั้งหมด)
+    cube, index = build_cube(frame), FilterIndex(frame)
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    months, edges = split_months(start, end)
+    top = list(frame['หน่วยงาน'].value_counts().index[:3])
+    for departments in ([ALL_DEPARTMENTS], top[:1], top):
+        keys = None if departments == [ALL_DEPARTMENTS] else departments
+        cell = lookup_sum(cube, departments, months)
+        n = department_n(cube, months, keys)
+        for lo, hi in edges:
+            cell = add_cells(cell, aggregate_rows(frame, index.rows(keys, lo, hi)))
+            n = n.add(department_n_rows(frame, index.rows(keys, lo, hi)), fill_value=0)
+        rows = index.rows(keys, start, end)
+        _same(cell, aggregate_rows(frame, rows))
+        expected = counts_table(department_n_rows(frame, rows))
+        pd.testing.assert_frame_equal(counts_table(n).sort_values('หน่วยงาน', ignore_index=True),
+                                      expected.sort_values('หน่วยงาน', ignore_index=True), check_dtype=False, check_categorical=False)
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import ALL_DEPARTMENTS, ALL_PERIODS
+from filter_engine import FilterIndex, period_bounds, split_months
+from sheet_sync import _parse
+
+
+@pytest.fixture(scope='module')
+def frame(survey):
+    return _parse(survey.to_csv(index=False).encode('utf-8'))
+
+
+def _expected(df, departments=None, start=None, end=None) -> np.ndarray:
+    mask = np.ones(len(df), dtype=bool)
+    if departments is not None:
+        mask &= df['หน่วยงาน'].isin([departments] if isinstance(departments, str) else departments).to_numpy()
+    if start is not None:
+        mask &= (df['date_col'] >= start).to_numpy()
+    if end is not None:
+        mask &= (df['date_col'] < end).to_numpy()
+    return np.flatnonzero(mask)
+
+
+@pytest.mark.parametrize('year, quarter, month', [
+    (ALL_PERIODS, ALL_PERIODS, ALL_PERIODS), (2024, ALL_PERIODS, ALL_PERIODS), (2024, 2, ALL_PERIODS), (2025, ALL_PERIODS, 11),
+])
+def test_select_matches_boolean_mask(frame, year, quarter, month):
+    index = FilterIndex(frame)
+    start, end = period_bounds(year, quarter, month)
+    departments = list(frame['หน่วยงาน'].value_counts().index[:3])
+    for dept in (ALL_DEPARTMENTS, departments[0], departments, []):
+        expected = _expected(frame, None if dept == ALL_DEPARTMENTS else dept, start, end)
+        rows = index.select(dept, year, quarter, month)
+        if isinstance(dept, list):
+            # หลายหน่วยงาน: เรียงตามเวลาภายในแต่ละหน่วยงาน ไม่เรียงรวม
+            for d in dept:
+                part = rows[frame['หน่วยงาน'].iloc[rows].to_numpy() == d]
+                assert (np.diff(part) > 0).all()
+            rows = np.sort(rows)
+        np.testing.assert_array_equal(rows, expected)
+
+
+def test_rows_by_date_range(frame):
+    index = FilterIndex(frame)
+    start, end = pd.Timestamp('2024-03-15'), pd.Timestamp('2024-07-02')
+    np.testing.assert_array_equal(index.rows(None, start, end), _expected(frame, None, start, end))
+    assert index.min_date == frame['date_col'].min() and index.max_date == frame['date_col'].max()
+    assert len(index.rows(['ไม่มีหน่วยงานนี้'], start, end)) == 0
+
+
+def test_requires_sorted_dates(frame):
+    with pytest.raises(ValueError):
+        FilterIndex(frame.iloc[::-1].reset_index(drop=True))
+
+
+@pytest.mark.parametrize('start, end, months, edges', [
+    ('2024-03-15', '2024-07-02', [(2024, 3 + i) for i in range(1, 4)], [('2024-03-15', '2024-04-01'), ('2024-07-01', '2024-07-02')]),
+    ('2024-03-01', '2024-05-01', [(2024, 3), (2024, 4)], []),
+    ('2024-12-01', '2025-02-10', [(2024, 12), (2025, 1)], [('2025-02-01', '2025-02-10')]),
+    ('2024-03-05', '2024-03-20', [], [('2024-03-05', '2024-03-20')]),
+])
+def test_split_months(start, end, months, edges):
+    full, rest = split_months(pd.Timestamp(start), pd.Timestamp(end))
+    assert full == [(y, ALL_PERIODS, m) for y, m in months]
+    assert rest == [(pd.Timestamp(a), pd.Timestamp(b)) for a, b in edges]
+
+
+def test_site_filter_matches_boolean_mask(frame):
+    sites = pd.Categorical(np.where(np.arange(len(frame)) % 3 == 0, 'รพ. B', 'รพ. A'), categories=['รพ. A', 'รพ. B', 'รพ. C'])
+    df = frame.assign(site=sites)
+    index = FilterIndex(df, 'site')
+    start, end = pd.Timestamp('2024-03-15'), pd.Timestamp('2024-07-02')
+    departments = list(frame['หน่วยงาน'].value_counts().index[:3])
+    for site in ('รพ. A', 'รพ. B', 'รพ. C'):
+        in_site = (df['site'] == site).to_numpy()
+        for dept in (None, departments[0], departments):
+            expected = np.intersect1d(_expected(df, dept, start, end), np.flatnonzero(in_site))
+            np.testing.assert_array_equal(np.sort(index.rows(dept, start, end, site=site)), expected)
+        np.testing.assert_array_equal(index.site_rows(site), np.flatnonzero(in_site))
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import ALL_DEPARTMENTS, ALL_PERIODS, HEALTH_COL, aggregate_rows, build_cube, lookup
+from metrics import AVG_SATISFACTION, HEALTH_MODE, INTENT_METRICS, RESPONSES, cell_metrics, metrics_table, n_col
+from scoring import SCORE_COLUMNS, OVERALL_SCORE_COL, MISSING_SCORE, satisfaction_cols
+from sheet_sync import _parse
+
+
+@pytest.fixture(scope='module')
+def frame(survey):
+    return _parse(survey.to_csv(index=False).encode('utf-8'))
+
+
+def _raw_metrics(df: pd.DataFrame) -> dict:
+    # metric จากแถวโดยตรง (แบบที่ dashboard เคยคำนวณก่อนมี cube)
+    out = {RESPONSES: len(df)}
+    s = df[OVERALL_SCORE_COL]
+    out[AVG_SATISFACTION] = s[s != MISSING_SCORE].mean()
+    health = df[HEALTH_COL].dropna().astype(str).value_counts()
+    out[HEALTH_MODE] = sorted(health[health == health.max()].index)[0] if len(health) else "N/A"
+    for col, label in INTENT_METRICS.items():
+        answered = df[col].dropna().astype(str).str.strip()
+        yes = 'มี' if col == 'มีความไม่พึงพอใจหรือไม่' else 'ใช่'
+        out[label] = (answered == yes).mean() * 100 if len(answered) else np.nan
+        out[n_col(label)] = len(answered)
+    for q in satisfaction_cols:
+        s = df[SCORE_COLUMNS[q]]
+        out[q] = s[s != MISSING_SCORE].mean()
+        out[n_col(q)] = int((s != MISSING_SCORE).sum())
+    return out
+
+
+def _assert_metrics(got: dict, expected: dict):
+    for name, value in expected.items():
+        if isinstance(value, str):
+            assert got[name] == value, name
+        else:
+            np.testing.assert_allclose(float(got[name]), float(value), rtol=1e-12, equal_nan=True, err_msg=name)
+
+
+def _filters(frame):
+    top = frame['หน่วยงาน'].value_counts().index[0]
+    year = int(frame['ปี'].max())
+    month = int(frame.loc[frame['ปี'] == year, 'เดือน'].iloc[0])
+    return [(ALL_DEPARTMENTS, ALL_PERIODS, ALL_PERIODS, ALL_PERIODS), (top, ALL_PERIODS, ALL_PERIODS, ALL_PERIODS),
+            (ALL_DEPARTMENTS, year, ALL_PERIODS, ALL_PERIODS), (top, year, 2, ALL_PERIODS), (top, year, ALL_PERIODS, month)]
+
+
+def _rows(frame, dept, year, quarter, month):
+    mask = np.ones(len(frame), dtype=bool)
+    if dept != ALL_DEPARTMENTS:
+        mask &= (frame['หน่วยงาน'] == dept).to_numpy()
+    for col, value in (('ปี', year), ('ไตรมาส', quarter), ('เดือน', month)):
+        if value != ALL_PERIODS:
+            mask &= (frame[col] == value).to_numpy()
+    return frame[mask]
+
+
+def test_cell_metrics_match_raw_rows(frame):
+    # metric จากช่องของ cube และจาก aggregate_rows (ช่วงวันที่กำหนดเอง) = คำนวณจากแถวโดยตรง
+    cube = build_cube(frame)
+    for key in _filters(frame):
+        rows = _rows(frame, *key)
+        _assert_metrics(cell_metrics(lookup(cube, *key)), _raw_metrics(rows))
+        _assert_metrics(cell_metrics(aggregate_rows(frame, np.flatnonzero(frame.index.isin(rows.index)))), _raw_metrics(rows))
+
+
+def test_metrics_table_matches_raw_rows(frame):
+    # ตารางรายงาน (หน่วยงาน x เดือน) ใช้สูตรเดียวกับ cell_metrics
+    cube = build_cube(frame)
+    table = metrics_table(cube, 'month')
+    for _, row in table.sample(20, random_state=0).iterrows():
+        expected = _raw_metrics(_rows(frame, row['หน่วยงาน'], row['ปี'], ALL_PERIODS, row['เดือน']))
+        _assert_metrics(row.to_dict(), expected)
@@ -0,0 +1,19 @@
+import logging
+
+import perf
+
+
+def test_session_profiling_leaves_root_logger_alone(monkeypatch):
+    root = logging.getLogger()
+    monkeypatch.setattr(perf.logger, 'handlers', [])
+    monkeypatch.setattr(perf.logger, 'propagate', True)
+    monkeypatch.setattr(perf.logger, 'level', logging.NOTSET)
+    handlers, level = list(root.handlers), root.level
+    timer = perf.RenderTimer(profiling=True)
+    assert timer.profiling and not perf.enabled()
+    assert root.handlers == handlers and root.level == level
+    assert len(perf.logger.handlers) == 1 and not perf.logger.propagate
+    assert perf.logger.getEffectiveLevel() == logging.INFO
+    perf.RenderTimer(profiling=True)
+    assert len(perf.logger.handlers) == 1
+    assert not perf.RenderTimer().profiling
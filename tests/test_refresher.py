@@ -0,0 +1,92 @@
+import queue
+import threading
+
+import pandas as pd
+import pytest
+
+from refresher import DatasetRefresher, Snapshot
+
+WAIT = 5
+
+
+def _snapshot(tag: str, loaded_at: float) -> Snapshot:
+    return Snapshot(pd.DataFrame(), None, pd.DataFrame(), None, None, None, tag, loaded_at)
+
+
+class Script:
+    # fetch ที่ทำตามลำดับผลลัพธ์ที่กำหนด (Snapshot หรือ exception) และบันทึก snapshot ก่อนหน้าที่ได้รับ
+    def __init__(self, *results):
+        self.results = list(results)
+        self.previous = []
+        self.calls = queue.Queue()
+        self.release = threading.Event()
+
+    def __call__(self, previous):
+        self.previous.append(previous)
+        result = self.results.pop(0) if self.results else None
+        self.calls.put(result)
+        if result is None:  # หมดสคริปต์: รอจนเทสต์จบ
+            self.release.wait(WAIT)
+            raise RuntimeError('done')
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+
+@pytest.fixture
+def run():
+    started = []
+
+    def start(script, **kwargs):
+        refresher = DatasetRefresher(script, **{'interval': 0.01, 'retry_delay': 0.01, **kwargs}).start()
+        started.append((refresher, script))
+        return refresher
+
+    yield start
+    for refresher, script in started:
+        refresher.stop()
+        script.release.set()
+
+
+def _wait_calls(script, n):
+    for _ in range(n):
+        script.calls.get(timeout=WAIT)
+
+
+def test_failed_fetch_keeps_serving_previous_snapshot(run):
+    first = _snapshot('sheet', loaded_at=1000.0)
+    script = Script(first, ConnectionError('timeout'), ConnectionError('timeout'))
+    refresher = run(script)
+    assert refresher.wait_first_attempt(WAIT)
+    _wait_calls(script, 4)  # สำเร็จ 1 + ล้มเหลว 2 + เริ่มรอบที่ 4
+    assert refresher.current() is first
+    assert isinstance(refresher.last_error, ConnectionError) and refresher.failures == 2
+    # ข้อมูลเดิมเก่ากว่า 2 รอบ -> dashboard แสดงป้าย stale (snapshot.age >= 2 * interval)
+    assert refresher.current().age >= 2 * refresher.interval
+    # ทุกรอบได้ snapshot ล่าสุดที่ดึงสำเร็จไว้ต่อยอด
+    assert script.previous[:4] == [None, first, first, first]
+
+
+def test_recovers_after_failures(run):
+    first, second = _snapshot('a', 1.0), _snapshot('b', 2.0)
+    script = Script(first, ConnectionError('x'), second)
+    refresher = run(script)
+    _wait_calls(script, 4)
+    assert refresher.current() is second
+    assert refresher.last_error is None and refresher.failures == 0
+
+
+def test_first_attempt_failure_has_no_snapshot(run):
+    script = Script(ConnectionError('offline'))
+    refresher = run(script, retry_delay=WAIT)
+    assert refresher.wait_first_attempt(WAIT)
+    assert refresher.current() is None and isinstance(refresher.last_error, ConnectionError)
+
+
+def test_backoff_grows_and_is_capped():
+    refresher = DatasetRefresher(lambda previous: None, interval=300, retry_delay=15, max_retry_delay=100)
+    delays = []
+    for failures in range(5):
+        refresher.failures = failures
+        delays.append(refresher._next_delay())
+    assert delays == [300, 15, 30, 60, 100]
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scoring import LIKERT_MAP, MISSING_SCORE, add_score_columns, normalize_to_1_5, score_series, OVERALL_SCORE_COL
+
+VALUES = [
+    *LIKERT_MAP, 'มากที่สุด ', '  ปานกลาง  ', 'พอใจมาก', 'น้อยมากๆ',  # Likert หลายรูปแบบ
+    5, 4.0, '3', ' 2 ', '5 - มากที่สุด', 'ระดับ 1', 0, '0', 6, '9',  # ตัวเลข (0/นอกช่วง -> ค่าว่าง)
+    '', '   ', '-', 'ไม่ตอบ', None, np.nan, pd.NA,  # ค่าว่าง
+]
+
+
+def _expected(s: pd.Series) -> pd.Series:
+    return pd.Series([normalize_to_1_5(v) for v in s], index=s.index, name=s.name, dtype='Int8').fillna(MISSING_SCORE).astype(np.int8)
+
+
+@pytest.mark.parametrize('categorical', [False, True])
+def test_score_series_matches_normalize(categorical):
+    # ผลเท่ากับเรียก normalize_to_1_5 ทีละเซลล์ (ค่าว่าง/แปลงไม่ได้ = MISSING_SCORE)
+    s = pd.Series(VALUES * 3, name='ความพึงพอใจโดยรวม', dtype=object)
+    if categorical:
+        s = s.astype(str).where(s.notna()).astype('category')
+    out = score_series(s)
+    assert out.dtype == np.int8 and out.name == s.name
+    pd.testing.assert_series_equal(out, _expected(s))
+    assert (out[s.isna()] == MISSING_SCORE).all()
+
+
+def test_score_series_keeps_index():
+    s = pd.Series(['มาก', None, ' น้อย'], index=[10, 3, 7])
+    pd.testing.assert_series_equal(score_series(s), pd.Series([4, MISSING_SCORE, 2], index=[10, 3, 7], dtype=np.int8))
+
+
+def test_missing_overall_column_is_all_missing():
+    out = add_score_columns(pd.DataFrame({'x': [1, 2]}))
+    assert (out[OVERALL_SCORE_COL] == MISSING_SCORE).all() and out[OVERALL_SCORE_COL].dtype == np.int8
@@ -0,0 +1,95 @@
+import pandas as pd
+
+import data_store
+import perf
+from sheet_sync import sync_sheet
+from synth import HEADERS
+
+
+def _csv(df: pd.DataFrame) -> bytes:
+    return df.to_csv(index=False).encode('utf-8')
+
+
+def _sync(state: dict, url=None):
+    before = perf.counters()
+    core, text = sync_sheet(url or state['url'], timeout=5)
+    after = perf.counters()
+    outcome = [o for (name, o), n in after.items() if name == 'sheet_sync' and n > before.get((name, o), 0)]
+    return core, text, outcome
+
+
+def _assert_same(a, b):
+    (core_a, text_a), (core_b, text_b) = a, b
+    pd.testing.assert_frame_equal(core_a, core_b, check_categorical=False)
+    pd.testing.assert_frame_equal(text_a.frame, text_b.frame)
+
+
+def test_unchanged_export_reuses_store(sheet, survey):
+    sheet['payload'] = _csv(survey)
+    core, text, outcome = _sync(sheet)
+    assert outcome == ['full'] and len(core) == len(survey)
+    again, again_text, outcome = _sync(sheet)
+    assert outcome == ['unchanged']
+    _assert_same((again, again_text), (core, text))
+
+
+def test_appended_rows_parse_only_the_tail(sheet, survey):
+    sheet['payload'] = _csv(survey.iloc[:500])
+    _sync(sheet)
+    sheet['payload'] = _csv(survey)
+    core, text, outcome = _sync(sheet)
+    assert outcome == ['append'] and len(core) == len(survey)
+    # แถวเดิมไม่ถูกเขียนซ้ำ: แถวใหม่อยู่ในไฟล์ส่วนต่อท้าย
+    data_path, _ = data_store.store_paths(next(p.stem for p in data_store.CACHE_DIR.glob('gsheet_*.json')))
+    assert data_store.segment_path(data_path, 1).exists()
+    full = _sync(sheet, sheet['url'] + '&full=1')
+    assert full[2] == ['full']
+    _assert_same((core, text), full[:2])
+
+
+def test_edited_prefix_falls_back_to_full_parse(sheet, survey):
+    sheet['payload'] = _csv(survey.iloc[:500])
+    _sync(sheet)
+    edited = survey.copy()
+    edited.iloc[3, edited.columns.get_loc(HEADERS['หน่วยงาน'])] = 'หน่วยตรวจตา (แก้ไข)'
+    sheet['payload'] = _csv(edited)
+    core, text, outcome = _sync(sheet)
+    assert outcome == ['full']
+    assert core['หน่วยงาน'].iloc[3] == 'หน่วยตรวจตา (แก้ไข)'
+    _assert_same((core, text), _sync(sheet, sheet['url'] + '&full=1')[:2])
+
+
+def test_segments_are_compacted(sheet, survey, monkeypatch):
+    monkeypatch.setattr(data_store, 'MAX_SEGMENTS', 3)
+    for rows in (300, 400, 450, 500, 600):
+        sheet['payload'] = _csv(survey.iloc[:rows])
+        core, text, _ = _sync(sheet)
+    assert len(core) == len(survey)
+    _assert_same((core, text), _sync(sheet, sheet['url'] + '&full=1')[:2])
+
+
+def test_new_answers_beyond_int8_codes_keep_appending(sheet, survey):
+    # คำตอบพิมพ์เอง (อาชีพ) เพิ่มทีละส่วนจนรวมเกิน 127 ค่า: ส่วนต่อท้ายต้องยังรวมกับส่วนฐานได้
+    typed = survey.copy()
+    typed[HEADERS['อาชีพ']] = [f'อาชีพ {i}' for i in range(len(typed))]
+    for rows in (100, 120, 140, 300):
+        sheet['payload'] = _csv(typed.iloc[:rows])
+        core, text, outcome = _sync(sheet)
+        assert outcome == (['full'] if rows == 100 else ['append'])
+    assert len(core) == 300 and core['อาชีพ'].nunique() == 300
+    _assert_same((core, text), _sync(sheet, sheet['url'] + '&full=1')[:2])
+
+
+def test_unreadable_store_is_rebuilt(sheet, survey):
+    sheet['payload'] = _csv(survey.iloc[:500])
+    _sync(sheet)
+    sheet['payload'] = _csv(survey)
+    _sync(sheet)
+    data_path, _ = data_store.store_paths(next(p.stem for p in data_store.CACHE_DIR.glob('gsheet_*.json')))
+    data_store.segment_path(data_path, 1).write_bytes(b'not a feather file')
+    core, text, outcome = _sync(sheet)
+    assert sorted(outcome) == ['full', 'recover', 'unchanged']
+    assert len(core) == len(survey)
+    again = _sync(sheet)
+    assert again[2] == ['unchanged']
+    _assert_same((core, text), again[:2])
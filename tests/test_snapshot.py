@@ -0,0 +1,47 @@
+import os
+
+import pandas as pd
+
+import perf
+from snapshot import load_snapshot
+
+
+def _load(path):
+    before = perf.counters()
+    core, text = load_snapshot(str(path))
+    after = perf.counters()
+    outcome = [o for (name, o), n in after.items() if name == 'snapshot' and n > before.get((name, o), 0)]
+    return core, text, outcome
+
+
+def test_unchanged_file_reuses_snapshot(tmp_path, survey):
+    path = tmp_path / 'opd.csv'
+    survey.to_csv(path, index=False)
+    core, text, outcome = _load(path)
+    assert outcome == ['rebuild'] and len(core) == len(survey)
+
+    again, again_text, outcome = _load(path)
+    assert outcome == ['hit']
+    pd.testing.assert_frame_equal(again, core)
+    pd.testing.assert_frame_equal(again_text.frame, text.frame)
+    assert again.attrs['lineage'] == core.attrs['lineage']
+
+    # mtime เปลี่ยนแต่เนื้อหาเดิม (copy ทับ) -> ตรวจ hash แล้วใช้ของเดิม ครั้งต่อไปเป็น hit อีก
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    touched, _, outcome = _load(path)
+    assert outcome == ['revalidated']
+    pd.testing.assert_frame_equal(touched, core)
+    assert _load(path)[2] == ['hit']
+
+
+def test_changed_file_rebuilds(tmp_path, survey):
+    path = tmp_path / 'opd.csv'
+    survey.iloc[:400].to_csv(path, index=False)
+    core, _, _ = _load(path)
+    survey.to_csv(path, index=False)
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    changed, _, outcome = _load(path)
+    assert outcome == ['rebuild'] and len(changed) == len(survey)
+    assert changed.attrs['lineage'] != core.attrs['lineage']
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_store import split_frame
+from text_index import EMPTY_ANSWERS, TextIndex, TextIndexes, page_rows
+
+TEXTS = pd.Series([
+    'รอนาน', None, 'ไม่มี', 'รอพบแพทย์นานเกิน 2 ชั่วโมง', '-', 'ที่จอดรถไม่พอ', '  รอใบนัดนาน ',
+    'เจ้าหน้าที่พูดไม่สุภาพ', '', 'Parking FULL', 'ห้องน้ำไม่สะอาด', 'รอนาน มาก',
+])
+
+
+def _brute(query: str) -> np.ndarray:
+    q = ' '.join(query.lower().split())
+    texts = TEXTS.dropna().map(lambda t: ' '.join(t.lower().split()))
+    texts = texts[~texts.isin(EMPTY_ANSWERS)]
+    return texts.index[texts.str.contains(q, regex=False)].to_numpy()
+
+
+@pytest.mark.parametrize('query', ['', 'รอ', 'นาน', 'รอนาน', 'ไม่', 'ไม่สุภาพ', 'parking', 'park ing', 'ไม่มีคำนี้', 'นาน มาก'])
+def test_search_matches_substring_scan(query):
+    index = TextIndex(TEXTS, EMPTY_ANSWERS)
+    np.testing.assert_array_equal(index.search(query), _brute(query))
+
+
+def test_empty_answers_are_skipped():
+    index = TextIndex(TEXTS, EMPTY_ANSWERS)
+    assert len(index) == 8
+    assert not set(index.rows) & {1, 2, 4, 8}
+
+
+def test_indexes_build_from_lazy_text():
+    _, text = split_frame(pd.DataFrame({'หน่วยงาน': ['ก'] * len(TEXTS), 'รายละเอียดความไม่พึงพอใจ': TEXTS}), ['หน่วยงาน'])
+    indexes = TextIndexes(text)
+    index = indexes.get('รายละเอียดความไม่พึงพอใจ')
+    assert indexes.get('รายละเอียดความไม่พึงพอใจ') is index
+    assert indexes.get('ความคาดหวังต่อบริการ') is None
+    np.testing.assert_array_equal(index.search('นาน'), _brute('นาน'))
+
+
+# สองชุดหลัง: posting ของหลายหน่วยงานต่อกัน (เรียงภายในแต่ละหน่วยงาน ไม่เรียงรวม)
+@pytest.mark.parametrize('rows', [
+    np.arange(2, 90), np.array([1, 5, 6, 7, 20, 33, 34, 50, 51, 52, 60, 99]),
+    np.array([33, 34, 60, 99, 1, 5, 6, 7, 20, 50, 51, 52]), np.array([3, 4, 9, 0, 1, 2, 5, 6, 7, 8]),
+])
+def test_page_rows_newest_first(rows):
+    hits = np.arange(0, 100, 3)
+    matched = np.intersect1d(hits, rows)
+    page_size = 4
+    pages = []
+    for page in range(-(-len(matched) // page_size)):
+        ids, total, used = page_rows(hits, rows, page, page_size)
+        assert total == len(matched) and used == page
+        assert (np.diff(ids) < 0).all()
+        pages.append(ids)
+    np.testing.assert_array_equal(np.concatenate(pages), matched[::-1])
+    ids, _, used = page_rows(hits, rows, 999, page_size)
+    assert used == (len(matched) - 1) // page_size
+    np.testing.assert_array_equal(ids, pages[-1])
+
+
+def test_page_rows_empty_filter():
+    ids, total, page = page_rows(np.arange(10), np.empty(0, dtype=np.int64), 3, 5)
+    assert len(ids) == 0 and total == 0 and page == 0
@@ -0,0 +1,53 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from timestamps import parse_timestamps
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('3/10/2025 9:05:07', '2025-10-03 09:05:07'),
+    ('03/10/2025 09:05', '2025-10-03 09:05:00'),
+    ('3/10/2025', '2025-10-03'),
+    ('2025-10-03 09:05:07', '2025-10-03 09:05:07'),
+    ('2025-10-03T09:05:07', '2025-10-03 09:05:07'),
+    ('3/10/2568 9:05:07', '2025-10-03 09:05:07'),  # ปี พ.ศ.
+    (' 3/10/2568 ', '2025-10-03'),
+    ('2568-10-03 09:05:07', '2025-10-03 09:05:07'),
+])
+def test_formats_and_buddhist_years(text, expected):
+    parsed, unparsed = parse_timestamps(pd.Series([text, '1/1/2024 0:00:00']))
+    assert parsed.iloc[0] == pd.Timestamp(expected)
+    assert unparsed == 0
+
+
+def test_day_first_and_mixed_sheet():
+    values = pd.Series(['1/2/2024 8:00:00', '13/2/2024 8:00:00', '1/2/2567 8:00:00', None, '', 'ไม่ระบุ'])
+    parsed, unparsed = parse_timestamps(values)
+    assert list(parsed.iloc[:3]) == [pd.Timestamp('2024-02-01 08:00'), pd.Timestamp('2024-02-13 08:00'), pd.Timestamp('2024-02-01 08:00')]
+    assert parsed.iloc[3:].isna().all()
+    assert unparsed == 1  # ค่าว่าง/None ไม่นับว่าแปลงไม่ได้
+    assert parsed.index.equals(values.index)
+
+
+def test_excel_datetimes_with_buddhist_years():
+    values = pd.Series([datetime(2568, 10, 3, 9, 5), datetime(2024, 1, 1), datetime(2566, 12, 31), None], dtype=object)
+    parsed, unparsed = parse_timestamps(values)
+    assert list(parsed.iloc[:3]) == [pd.Timestamp('2025-10-03 09:05'), pd.Timestamp('2024-01-01'), pd.Timestamp('2023-12-31')]
+    assert pd.isna(parsed.iloc[3]) and unparsed == 0
+
+
+def test_matches_pandas_on_synthetic_export(survey):
+    values = survey['ประทับเวลา']
+    parsed, unparsed = parse_timestamps(values)
+    expected = pd.to_datetime(values, format='%d/%m/%Y %H:%M:%S')
+    pd.testing.assert_series_equal(parsed, expected, check_names=False)
+    assert unparsed == 0
+
+
+def test_datetime_column_passes_through():
+    values = pd.Series(pd.to_datetime(['2024-01-01', None]))
+    parsed, unparsed = parse_timestamps(values)
+    assert parsed.dtype == np.dtype('datetime64[ns]') and unparsed == 0
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import trends
+from filter_engine import FilterIndex
+from scoring import OVERALL_COL
+from sheet_sync import sync_sheet
+from sources import SITE_COL, Source, load_sources
+from synth import HEADERS, generate
+from trends import FREQS, TREND_METRICS, TrendStore, site_trends, trend_series
+
+
+def _csv(df: pd.DataFrame) -> bytes:
+    return df.to_csv(index=False).encode('utf-8')
+
+
+def _sync(sheet):
+    core, _ = sync_sheet(sheet['url'], timeout=5)
+    return core, core.attrs['lineage']
+
+
+def _assert_same(a: TrendStore, b: TrendStore):
+    for freq in FREQS:
+        left, right = (s.sums[freq].reset_index().astype({'หน่วยงาน': object}) for s in (a, b))
+        keys = ['หน่วยงาน', 'ช่วง']
+        pd.testing.assert_frame_equal(left.sort_values(keys, ignore_index=True), right.sort_values(keys, ignore_index=True), check_like=True)
+
+
+@pytest.fixture
+def summarized(monkeypatch):
+    # จำนวนแถวที่ถูกสรุปในแต่ละครั้ง (ใช้ตรวจว่าต่อยอดเฉพาะแถวใหม่)
+    calls = []
+    original = trends._bucket_sums
+
+    def spy(df, freq):
+        calls.append(len(df))
+        return original(df, freq)
+
+    monkeypatch.setattr(trends, '_bucket_sums', spy)
+    return calls
+
+
+def test_extend_after_append_equals_build(sheet, survey, summarized):
+    sheet['payload'] = _csv(survey.iloc[:500])
+    core, lineage = _sync(sheet)
+    store = TrendStore.build(core, lineage=lineage)
+    sheet['payload'] = _csv(survey)
+    core, lineage = _sync(sheet)
+    summarized.clear()
+    extended = store.extend(core, lineage=lineage)
+    assert summarized == [len(survey) - 500] * len(FREQS)
+    _assert_same(extended, TrendStore.build(core))
+    core, lineage = _sync(sheet)  # ไม่มีแถวใหม่
+    assert extended.extend(core, lineage=lineage) is extended
+
+
+def test_extend_after_edit_equals_build(sheet, survey):
+    sheet['payload'] = _csv(survey)
+    core, lineage = _sync(sheet)
+    store = TrendStore.build(core, lineage=lineage)
+    # แก้คะแนนรวมทุกแถวเป็น 1 โดย 'ประทับเวลา' เดิม และย้ายหน่วยงาน: sheet_sync parse ใหม่ทั้งหมด
+    edited = survey.copy()
+    edited[HEADERS[OVERALL_COL]] = 'น้อยมาก'
+    edited[HEADERS['หน่วยงาน']] = 'หน่วยตรวจตา'
+    sheet['payload'] = _csv(edited)
+    core, new_lineage = _sync(sheet)
+    assert new_lineage != lineage
+    extended = store.extend(core, lineage=new_lineage)
+    assert extended is not store
+    _assert_same(extended, TrendStore.build(core))
+    series = trend_series(extended, 'คะแนนพึงพอใจเฉลี่ย', 'month')
+    assert (series.loc[series['n'] > 0, 'ค่า'] == 1.0).all()
+    assert trend_series(extended, 'คะแนนพึงพอใจเฉลี่ย', 'month', 'หน่วยตรวจอายุรศาสตร์').empty
+
+
+def test_unknown_lineage_rebuilds(survey):
+    df = survey.iloc[:0]
+    store = TrendStore.build(df)
+    assert store.extend(df) is not store  # ไม่มี lineage -> ไม่ถือว่าแถวเดิมเหมือนเดิม
+
+
+def test_sites_extend_independently(sheet, summarized):
+    # แหล่ง B ต่อท้ายด้วยแถวที่เก่ากว่าข้อมูลล่าสุดของ A: ในชุดรวมแถวเหล่านี้อยู่กลางตาราง
+    a = generate(400, seed=3, start='2023-01-01', end='2025-06-30')
+    b = generate(300, seed=4, start='2023-01-01', end='2024-01-01')
+    sheet['routes'] = {'/a': _csv(a), '/b': _csv(b.iloc[:250])}
+    sources = [Source('A', sheet['base'] + '/a'), Source('B', sheet['base'] + '/b')]
+
+    def load(previous=None):
+        df, _, status = load_sources(sources)
+        stores = site_trends(df, FilterIndex(df, SITE_COL), status, previous)
+        return df, stores, TrendStore.combine(list(stores.values()))
+
+    df, stores, combined = load()
+    _assert_same(combined, TrendStore.build(df))
+
+    sheet['routes']['/b'] = _csv(b)
+    summarized.clear()
+    df, new_stores, combined = load(stores)
+    assert new_stores['A'] is stores['A']
+    assert summarized == [50] * len(FREQS)
+    _assert_same(new_stores['B'], TrendStore.build(df, np.flatnonzero((df[SITE_COL] == 'B').to_numpy())))
+    _assert_same(combined, TrendStore.build(df))
+    for metric in TREND_METRICS:
+        pd.testing.assert_frame_equal(trend_series(combined, metric, 'week'), trend_series(TrendStore.build(df), metric, 'week'))
@@ -0,0 +1,99 @@
+# ==============================================================================
+# FREE-TEXT INDEX (ความไม่พึงพอใจ / ความคาดหวังต่อบริการ)
+# ==============================================================================
+# สร้างครั้งเดียวต่อการโหลดข้อมูล (เมื่อมีการเปิดดูครั้งแรก) และใช้ร่วมกันทุก session:
+#   - row id ของแถวที่มีข้อความจริง (เรียงตามเวลาเหมือนชุดข้อมูลหลัก)
+#   - inverted index ของ 3-gram ตัวอักษร -> ลำดับข้อความ ภาษาไทยไม่เว้นวรรคระหว่างคำ
+#     จึงค้นแบบ substring: ตัดผู้สมัครด้วย 3-gram แล้วตรวจ substring จริงเฉพาะผู้สมัคร
+# หน้า dashboard ส่งไปแสดงเฉพาะหน้าปัจจุบัน (ใหม่สุดก่อน) ดู page_rows
+import threading
+
+import numpy as np
+import pandas as pd
+
+EMPTY_ANSWERS = ('', 'ไม่มี', '-')
+# คอลัมน์ข้อความที่ค้นได้ -> คำตอบที่ไม่นับว่ามีข้อความ
+TEXT_COLUMNS = {
+    'รายละเอียดความไม่พึงพอใจ': EMPTY_ANSWERS,
+    'ความคาดหวังต่อบริการ': (),
+}
+GRAM = 3
+
+
+def _normalize(text) -> str:
+    return ' '.join(str(text).lower().split())
+
+
+def _grams(text: str) -> set:
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+class TextIndex:
+    def __init__(self, values: pd.Series, skip=()):
+        # values: คอลัมน์ข้อความที่ index เป็น row id (RangeIndex ของชุดข้อมูล)
+        texts = values.dropna().astype(str).map(_normalize)
+        texts = texts[~texts.isin(skip)] if len(skip) else texts[texts != '']
+        self.rows = texts.index.to_numpy(dtype=np.int64)
+        self._texts = texts.to_numpy(dtype=object)
+        postings = {}
+        for i, t in enumerate(self._texts):
+            for g in _grams(t):
+                postings.setdefault(g, []).append(i)
+        self._postings = {g: np.array(p, dtype=np.int64) for g, p in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def search(self, query: str = '') -> np.ndarray:
+        # row id (เรียงจากเก่าไปใหม่) ของข้อความที่มี query เป็น substring; query ว่าง -> ทุกแถว
+        q = _normalize(query) if query else ''
+        if not q:
+            return self.rows
+        if len(q) >= GRAM:
+            candidates = None
+            for g in _grams(q):
+                p = self._postings.get(g)
+                if p is None:
+                    return np.empty(0, dtype=np.int64)
+                candidates = p if candidates is None else np.intersect1d(candidates, p, assume_unique=True)
+        else:
+            candidates = range(len(self._texts))
+        hits = [i for i in candidates if q in self._texts[i]]
+        return self.rows[np.array(hits, dtype=np.int64)]
+
+
+class TextIndexes:
+    # TextIndex ของแต่ละคอลัมน์ สร้างเมื่อถูกใช้ครั้งแรก (ต้องแปลง LazyFrame เป็น pandas)
+    def __init__(self, text, columns: dict = TEXT_COLUMNS):
+        # text: data_store.LazyFrame, columns: คอลัมน์ -> คำตอบที่ไม่นับเป็นข้อความ
+        self._text = text
+        self._columns = columns
+        self._built = {}
+        self._lock = threading.Lock()
+
+    def get(self, column: str):
+        if column not in self._columns or column not in self._text.columns:
+            return None
+        if column not in self._built:
+            with self._lock:
+                if column not in self._built:
+                    self._built[column] = TextIndex(self._text.frame[column], self._columns[column])
+        return self._built[column]
+
+
+def page_rows(hits: np.ndarray, rows: np.ndarray, page: int, page_size: int) -> tuple[np.ndarray, int, int]:
+    # (row id ของหน้าที่ page (เริ่ม 0) แบบใหม่สุดก่อน, จำนวนทั้งหมด, หน้าที่ใช้จริง) จาก hits ที่อยู่ใน
+    # ชุด rows ของตัวกรอง; hits เรียงจากน้อยไปมาก rows ไม่ซ้ำแต่ไม่จำเป็นต้องเรียง (FilterIndex.rows ของ
+    # หลายหน่วยงาน) rows ที่เป็นช่วงต่อเนื่อง (ไม่กรองหน่วยงาน) ใช้ binary search แทน
+    # page เกินจำนวนหน้าจะถูกปรับเป็นหน้าสุดท้าย
+    if len(rows) == 0:
+        return np.empty(0, dtype=np.int64), 0, 0
+    first, last = rows.min(), rows.max()
+    if last - first + 1 == len(rows):
+        matched = hits[np.searchsorted(hits, first):np.searchsorted(hits, last, side='right')]
+    else:
+        matched = np.intersect1d(hits, rows, assume_unique=True)
+    total = len(matched)
+    page = max(0, min(page, (total - 1) // page_size))
+    end = total - page * page_size
+    return matched[max(0, end - page_size):end][::-1], total, page
@@ -0,0 +1,110 @@
+# ==============================================================================
+# TIMESTAMP PARSING ('ประทับเวลา')
+# ==============================================================================
+# Google Forms/Sheets export เวลาได้หลายรูปแบบ (d/m/yyyy H:MM:SS, yyyy-mm-dd ...) และบางชีต
+# ใช้ปีพุทธศักราช (2568) ซึ่ง pandas แปลงไม่ได้ (เกินปี 2262) แถวเหล่านั้นจึงเคยหายไป
+#   - parse เฉพาะค่าที่ไม่ซ้ำ แล้ว map กลับทุกแถว (เวลาที่ซ้ำกันมีมากใน export ของชีต)
+#   - เดารูปแบบครั้งเดียวจากตัวอย่างค่าที่ไม่ซ้ำ แล้ว parse ด้วย format ตายตัว ค่าที่เหลือลอง
+#     รูปแบบถัดไป สุดท้ายจึงให้ pandas เดาแบบ dayfirst (ช้า เหลือเฉพาะค่าแปลก ๆ)
+#   - รูปแบบ 'วันที่ เวลา' แยกส่วนวันที่กับส่วนเวลาออกจากกันแล้ว parse ค่าไม่ซ้ำของแต่ละส่วน:
+#     เวลาประทับแทบไม่ซ้ำกันเลย แต่วันที่มีแค่หลักพันค่า และเวลาของวันไม่เกิน 86,400 ค่า
+#   - ค่าที่ยังแปลงไม่ได้จึงตัดช่องว่าง และแปลงปี พ.ศ. (>= 2400) เป็น ค.ศ. (-543) แล้วลองใหม่
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+BE_OFFSET = 543
+BE_MIN_YEAR = 2400
+# เรียงตามที่พบบ่อยใน export; วัน/เดือนขึ้นก่อนเสมอ (แบบฟอร์มใช้ locale ไทย)
+FORMATS = (
+    '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d/%m/%Y',
+    '%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d',
+    '%d-%m-%Y %H:%M:%S', '%d-%m-%Y',
+)
+SAMPLE_SIZE = 500
+_BE_YEAR = r'(?<!\d)(2[4-9]\d\d)(?!\d)'
+
+
+def _to_ce(value):
+    # datetime/date ที่ปีเป็น พ.ศ. (เช่นจาก Excel) -> ค.ศ.
+    if value.year >= BE_MIN_YEAR:
+        try:
+            value = value.replace(year=value.year - BE_OFFSET)
+        except ValueError:  # 29 ก.พ. ที่ปี ค.ศ. ไม่ใช่ปีอธิกสุรทิน
+            return pd.NaT
+    return pd.Timestamp(value)
+
+
+def detect_formats(texts: pd.Series) -> list:
+    # รูปแบบที่ parse ตัวอย่างได้ เรียงจากได้มากสุด
+    sample = texts.iloc[:SAMPLE_SIZE]
+    hits = {fmt: pd.to_datetime(sample, format=fmt, errors='coerce').notna().sum() for fmt in FORMATS}
+    return [fmt for fmt in sorted(hits, key=hits.get, reverse=True) if hits[fmt]]
+
+
+def _parse_unique(values: pd.Series, fmt: str) -> np.ndarray:
+    codes, uniques = pd.factorize(values)
+    return pd.to_datetime(pd.Series(uniques, dtype=object), format=fmt, errors='coerce').to_numpy(dtype='datetime64[ns]')[codes]
+
+
+def _parse_format(texts: pd.Series, fmt: str) -> pd.Series:
+    if ' ' not in fmt:
+        return pd.to_datetime(texts, format=fmt, errors='coerce')
+    date_fmt, time_fmt = fmt.split(' ', 1)
+    # แยกด้วย Arrow (เร็วกว่า .str.partition ที่วนทีละแถวใน Python หลายเท่า)
+    parts = pc.split_pattern(pa.array(texts.to_numpy(), type=pa.string()), ' ', max_splits=1)
+    day = _parse_unique(pd.Series(pc.list_element(parts, 0).to_numpy(zero_copy_only=False)), date_fmt)
+    clock = pc.if_else(pc.greater(pc.list_value_length(parts), 1), pc.list_slice(parts, 1, 2), pa.scalar([''], pa.list_(pa.string())))
+    clock = pd.Series(pc.list_flatten(clock).to_numpy(zero_copy_only=False))
+    clock = _parse_unique(clock, time_fmt) - np.datetime64('1900-01-01', 'ns')  # strptime ใช้ 1900-01-01 เป็นวันฐาน
+    return pd.Series(day + clock, index=texts.index)
+
+
+def _parse_known(texts: pd.Series, formats: list, out: pd.Series) -> pd.Series:
+    # เติม out ด้วยรูปแบบใน formats ตามลำดับ คืนค่าที่ยังแปลงไม่ได้
+    for fmt in formats:
+        if texts.empty:
+            break
+        parsed = _parse_format(texts, fmt)
+        ok = parsed.notna()
+        out[ok[ok].index] = parsed[ok]
+        texts = texts[~ok]
+    return texts
+
+
+def _parse_texts(texts: pd.Series) -> pd.Series:
+    out = pd.Series(pd.NaT, index=texts.index, dtype='datetime64[ns]')
+    rest = _parse_known(texts, detect_formats(texts), out)
+    if not rest.empty:
+        rest = rest.str.strip().str.replace(_BE_YEAR, lambda m: str(int(m.group(1)) - BE_OFFSET), regex=True)
+        rest = _parse_known(rest, detect_formats(rest), out)
+    if not rest.empty:
+        # รูปแบบที่ไม่อยู่ใน FORMATS: ให้ pandas เดาทีละค่า (ช้า แต่เหลือน้อย)
+        out[rest.index] = pd.to_datetime(rest, dayfirst=True, errors='coerce', format='mixed')
+    return out
+
+
+def parse_timestamps(values: pd.Series) -> tuple[pd.Series, int]:
+    # คืน (datetime64[ns] ที่ index เดียวกับ values, จำนวนแถวที่มีค่าแต่แปลงไม่ได้)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.astype('datetime64[ns]'), 0
+    present = values.notna() & (values != '')
+    codes, uniques = pd.factorize(values[present], sort=False)
+    uniques = pd.Series(uniques, dtype=object)
+    parsed = pd.Series(pd.NaT, index=uniques.index, dtype='datetime64[ns]')
+    kind = pd.api.types.infer_dtype(uniques, skipna=True)
+    if kind == 'string':
+        is_dt = pd.Series(False, index=uniques.index)
+    else:
+        is_dt = uniques.map(lambda v: isinstance(v, (datetime, date)))
+    if is_dt.any():
+        parsed[is_dt] = pd.to_datetime(uniques[is_dt].map(_to_ce))
+    if (~is_dt).any():
+        parsed[~is_dt] = _parse_texts(uniques[~is_dt].astype(str))
+    result = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[ns]')
+    result[present.to_numpy()] = parsed.to_numpy()[codes]
+    out = pd.Series(result, index=values.index)
+    return out, int(present.sum() - out.notna().sum())
@@ -0,0 +1,175 @@
+# ==============================================================================
+# TRENDS (รายสัปดาห์ / รายเดือน)
+# ==============================================================================
+# เก็บผลรวมสะสม (จำนวน, ผลรวม, ผลรวมกำลังสอง / จำนวน "ใช่") ต่อ (หน่วยงาน, ช่วงเวลา)
+# ของ metric ที่ดูแนวโน้ม เมื่อมีแถวใหม่ต่อท้าย (sheet_sync แบบ append) จะสรุปเฉพาะแถวใหม่
+# แล้วบวกเข้าช่องของช่วงเวลาที่เกี่ยวข้อง ไม่ต้องสแกนข้อมูลเดิมทั้งชุดซ้ำ
+# ผลรวมเหล่านี้พอสำหรับค่าเฉลี่ย, ช่วงความเชื่อมั่น 95% และค่าเฉลี่ยเคลื่อนที่ (ถ่วงด้วย n)
+#
+# แถวเดิมยังเหมือนเดิมหรือไม่ ดูจาก lineage ของแหล่งข้อมูล (sources.SourceStatus.lineage):
+# sheet_sync/snapshot เปลี่ยนค่านี้ทุกครั้งที่ parse ใหม่ทั้งหมด (ข้อมูลเดิมถูกแก้/ลบ/ไฟล์เปลี่ยน)
+# และคงค่าเดิมเมื่อแค่ต่อท้าย เก็บ store แยกต่อแหล่ง (สถานพยาบาล) แล้วรวมเป็นของทั้งชุด
+# แถวใหม่ของแหล่งหนึ่งที่เวลาเก่ากว่าแหล่งอื่นจึงไม่ทำให้ต้องสร้างของแหล่งอื่นใหม่
+import numpy as np
+import pandas as pd
+
+from aggregates import ALL_DEPARTMENTS, INTENT_COLS, _equals
+from scoring import SCORE_COLUMNS, OVERALL_SCORE_COL, MISSING_SCORE
+
+FREQS = ('week', 'month')
+SERIES_COLUMNS = ['ช่วง', 'n', 'ค่า', 'ต่ำสุด', 'สูงสุด', 'ค่าเฉลี่ยเคลื่อนที่']
+Z95 = 1.959964
+COMPLAINT_COL = 'มีความไม่พึงพอใจหรือไม่'
+# metric -> (ชนิด, คอลัมน์); 'score' = ค่าเฉลี่ยคะแนน 1-5, 'rate' = % คำตอบ "ใช่" (INTENT_COLS)
+TREND_METRICS = {
+    'คะแนนพึงพอใจเฉลี่ย': ('score', OVERALL_SCORE_COL),
+    'Q3 ระยะเวลารอคอย': ('score', SCORE_COLUMNS['Q3_ระยะเวลารอคอย']),
+    '% ไม่พึงพอใจ': ('rate', COMPLAINT_COL),
+}
+
+
+def bucket_starts(dates: pd.Series, freq: str) -> np.ndarray:
+    # วันเริ่มต้นของช่วง: สัปดาห์เริ่มวันจันทร์ / วันที่ 1 ของเดือน (datetime64[ns], NaT คงเดิม)
+    d = dates.to_numpy(dtype='datetime64[ns]')
+    if freq == 'month':
+        return d.astype('datetime64[M]').astype('datetime64[ns]')
+    days = d.astype('datetime64[D]')
+    weekday = (days.astype(np.int64) + 3) % 7  # 1970-01-01 เป็นวันพฤหัสบดี; จันทร์ = 0
+    return (days - weekday.astype('timedelta64[D]')).astype('datetime64[ns]')
+
+
+def _measures(df: pd.DataFrame) -> dict:
+    m = {}
+    for kind, col in TREND_METRICS.values():
+        if col not in df.columns:
+            continue
+        if kind == 'score':
+            s = df[col].to_numpy(dtype=np.int64)
+            m[f'{col}__n'] = (s != MISSING_SCORE).astype(np.int64)
+            m[f'{col}__sum'] = s
+            m[f'{col}__sumsq'] = s * s
+        else:
+            m[f'{col}__yes'] = _equals(df[col], INTENT_COLS[col]).astype(np.int64)
+            m[f'{col}__n'] = df[col].notna().to_numpy(dtype=np.int64)
+    return m
+
+
+def _bucket_sums(df: pd.DataFrame, freq: str) -> pd.DataFrame:
+    if df.empty or 'date_col' not in df.columns:
+        return pd.DataFrame()
+    keys = pd.DataFrame({
+        'หน่วยงาน': df['หน่วยงาน'] if 'หน่วยงาน' in df.columns else np.nan,
+        'ช่วง': bucket_starts(df['date_col'], freq),
+    })
+    frame = pd.concat([keys, pd.DataFrame(_measures(df), index=df.index)], axis=1)
+    return frame.dropna(subset=['ช่วง']).groupby(['หน่วยงาน', 'ช่วง'], dropna=False, sort=True, observed=True).sum()
+
+
+def _take(df: pd.DataFrame, rows) -> pd.DataFrame:
+    # เฉพาะคอลัมน์ที่ใช้สรุป ของแถว rows (None = ทุกแถว)
+    if rows is None:
+        return df
+    cols = [c for c in ['หน่วยงาน', 'date_col', *(col for _, col in TREND_METRICS.values())] if c in df.columns]
+    return df.iloc[rows, df.columns.get_indexer(cols)]
+
+
+def _add(old: pd.DataFrame, part: pd.DataFrame) -> pd.DataFrame:
+    # ช่วงที่มีอยู่แล้วถูกบวกเพิ่ม ช่วงใหม่ถูกต่อท้าย (ขนาดตามจำนวนช่วง ไม่ใช่จำนวนแถว)
+    if old.empty or part.empty:
+        return part if old.empty else old
+    return old.add(part, fill_value=0).astype(np.int64)
+
+
+class TrendStore:
+    # ผลรวมต่อ (หน่วยงาน, ช่วง) ของทุก freq ของแหล่งข้อมูลหนึ่ง (หรือหลายแหล่งรวมกัน ดู combine)
+    # ใช้ร่วมกันทุก session แบบอ่านอย่างเดียว; extend() คืน store ใหม่ ไม่แก้ของเดิม
+    def __init__(self, sums: dict, rows: int = 0, lineage: str = ''):
+        self.sums = sums
+        self.rows = rows  # จำนวนแถวของแหล่งที่สรุปไว้แล้ว
+        self.lineage = lineage
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, rows=None, lineage: str = '') -> 'TrendStore':
+        # rows: row id ของแหล่งนี้ใน df เรียงตามลำดับในแหล่ง (None = ทุกแถวของ df)
+        part = _take(df, rows)
+        return cls({freq: _bucket_sums(part, freq) for freq in FREQS}, len(part), lineage)
+
+    def extend(self, df: pd.DataFrame, rows=None, lineage: str = '') -> 'TrendStore':
+        # lineage เดิม (ไม่ว่าง) = แถวเดิมไม่ถูกแก้ -> บวกเฉพาะแถวที่ต่อท้ายเข้ามา; อื่น ๆ -> สร้างใหม่
+        total = len(df) if rows is None else len(rows)
+        if not lineage or lineage != self.lineage or total < self.rows:
+            return TrendStore.build(df, rows, lineage)
+        if total == self.rows:
+            return self
+        new = df.iloc[self.rows:] if rows is None else _take(df, rows[self.rows:])
+        return TrendStore({freq: _add(self.sums[freq], _bucket_sums(new, freq)) for freq in FREQS}, total, lineage)
+
+    @classmethod
+    def combine(cls, stores: list) -> 'TrendStore':
+        # store ของทั้งชุดจาก store ของแต่ละแหล่ง (บวกกันที่ระดับช่วง ไม่สแกนแถวข้อมูล)
+        if len(stores) == 1:
+            return stores[0]
+        sums = {}
+        for freq in FREQS:
+            parts = [s.sums[freq] for s in stores if not s.sums[freq].empty]
+            sums[freq] = (pd.concat(parts).groupby(level=['หน่วยงาน', 'ช่วง'], dropna=False, sort=True, observed=True).sum().astype(np.int64)
+                          if parts else pd.DataFrame())
+        return cls(sums, sum(s.rows for s in stores))
+
+
+def site_trends(df: pd.DataFrame, index, status, previous: dict = None) -> dict:
+    # {สถานพยาบาล: TrendStore} ของทุกแหล่งที่มีแถว ต่อยอดจาก previous (store ของรอบก่อน) เมื่อทำได้
+    # index: filter_engine.FilterIndex ที่มี posting ของสถานพยาบาล; แต่ละแหล่งเรียงตามเวลาอยู่แล้ว
+    # (prepare_frame, แถวต่อท้ายไม่เก่ากว่า watermark) และ sources รวมด้วย stable sort
+    # ลำดับ row id ของแหล่งใน df จึงตรงกับลำดับแถวในแหล่ง แถวที่ต่อท้ายคือ rows[store.rows:]
+    stores = {}
+    for s in status:
+        rows = index.site_rows(s.site)
+        if not len(rows):
+            continue
+        prev = (previous or {}).get(s.site)
+        stores[s.site] = prev.extend(df, rows, s.lineage) if prev is not None else TrendStore.build(df, rows, s.lineage)
+    return stores
+
+
+def trend_series(store: TrendStore, metric: str, freq: str = 'month', department=ALL_DEPARTMENTS, window: int = 3) -> pd.DataFrame:
+    # ช่วง, n, ค่า, ขอบล่าง/บน 95% CI, ค่าเฉลี่ยเคลื่อนที่ window ช่วง (ถ่วงด้วย n)
+    # department: ALL_DEPARTMENTS, ชื่อหน่วยงาน หรือ list ของหน่วยงาน (รวมผลรวมของทุกหน่วยงานที่เลือก)
+    # ช่วงที่ไม่มีผู้ตอบยังอยู่ในตาราง (n = 0, ค่าเป็น NaN) เส้นกราฟจึงขาดตรงช่วงนั้น
+    kind, col = TREND_METRICS[metric]
+    sums = store.sums[freq]
+    if sums.empty or f'{col}__n' not in sums.columns:
+        return pd.DataFrame(columns=SERIES_COLUMNS)
+    if not isinstance(department, str):
+        sums = sums[sums.index.get_level_values('หน่วยงาน').isin(list(department))]
+    elif department != ALL_DEPARTMENTS:
+        sums = sums[sums.index.get_level_values('หน่วยงาน') == department]
+    if sums.empty:
+        return pd.DataFrame(columns=SERIES_COLUMNS)
+    cells = sums.groupby(level='ช่วง').sum()
+    periods = pd.date_range(cells.index.min(), cells.index.max(), freq='W-MON' if freq == 'week' else 'MS')
+    cells = cells.reindex(periods, fill_value=0)
+    n = cells[f'{col}__n'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if kind == 'score':
+            total, sq = cells[f'{col}__sum'].to_numpy(dtype=float), cells[f'{col}__sumsq'].to_numpy(dtype=float)
+            value = np.where(n > 0, total / n, np.nan)
+            var = np.where(n > 1, (sq - n * value * value) / (n - 1), np.nan)
+            half = Z95 * np.sqrt(np.maximum(var, 0) / n)
+            lo, hi = value - half, value + half
+            scale = 1.0
+        else:
+            # Wilson score interval: ใช้ได้แม้สัดส่วนใกล้ 0 หรือช่วงที่มีผู้ตอบน้อย
+            total = cells[f'{col}__yes'].to_numpy(dtype=float)
+            p = np.where(n > 0, total / n, np.nan)
+            denom = 1 + Z95 ** 2 / n
+            center = (p + Z95 ** 2 / (2 * n)) / denom
+            half = Z95 * np.sqrt(p * (1 - p) / n + Z95 ** 2 / (4 * n * n)) / denom
+            value, lo, hi, scale = p, center - half, center + half, 100.0
+        roll_n = pd.Series(n).rolling(window, min_periods=1).sum().to_numpy()
+        roll_total = pd.Series(total).rolling(window, min_periods=1).sum().to_numpy()
+        moving = np.where(roll_n > 0, roll_total / roll_n, np.nan)
+    return pd.DataFrame({
+        'ช่วง': periods, 'n': n.astype(np.int64), 'ค่า': value * scale,
+        'ต่ำสุด': lo * scale, 'สูงสุด': hi * scale, 'ค่าเฉลี่ยเคลื่อนที่': moving * scale,
+    })